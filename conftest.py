@@ -0,0 +1,20 @@
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_caches():
+    """Кеш тестов во временном каталоге, как у manage.py test."""
+    from core.testing import isolate_caches, remove_caches
+
+    directory = isolate_caches()
+    yield
+    remove_caches(directory)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(isolated_caches):
+    """Версии кеша поднимаются только при коммите, а транзакция теста
+    откатывается: кеш прошлого теста сбрасываем, как setUp в TestCase."""
+    from django.core.cache import cache
+
+    cache.clear()
@@ -0,0 +1,90 @@
+"""Нагрузочный прогон: python -m benchmarks --scale small --compare small."""
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+import django
+
+
+def parse_args():
+    from .data import SCALES
+    from .scenarios import MIXES
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--mix', choices=MIXES, default='mixed')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    for field in ('users', 'groups', 'posts', 'comments', 'follows'):
+        parser.add_argument(f'--{field}', type=int)
+    parser.add_argument('--save', metavar='NAME',
+                        help='сохранить результат как базовую линию')
+    parser.add_argument('--compare', metavar='NAME',
+                        help='сравнить с сохранённой базовой линией')
+    return parser.parse_args()
+
+
+def print_report(report):
+    header = ('endpoint', 'count', 'p50', 'p95', 'p99', 'queries', 'rps')
+    print('{:<18}{:>7}{:>10}{:>10}{:>10}{:>9}{:>9}'.format(*header))
+    for name, row in sorted(report.items(), key=lambda item: item[0]):
+        print('{:<18}{count:>7}{p50:>10}{p95:>10}{p99:>10}'
+              '{queries:>9}{rps:>9}'.format(name, **row))
+
+
+def setup(directory):
+    """Django с кешем в directory: прогон не трогает кеш сервера."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    from django.conf import settings
+
+    settings.CACHES = {
+        'default': dict(
+            settings.CACHES['default'],
+            LOCATION=os.path.join(directory, 'cache.sqlite3'),
+        ),
+    }
+    django.setup()
+
+
+def run():
+    from django.db import connection
+
+    from .data import SCALES, seed
+    from .runner import compare, load_baseline, replay, save_baseline
+    from .scenarios import MIXES
+
+    args = parse_args()
+    sizes = dict(SCALES[args.scale])
+    for field in sizes:
+        if getattr(args, field) is not None:
+            sizes[field] = getattr(args, field)
+    rnd = random.Random(args.seed)
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        state = seed(rnd=rnd, **sizes)
+        report = replay(MIXES[args.mix], state, args.requests, rnd)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    print_report(report)
+    if args.save:
+        save_baseline(args.save, report)
+    if args.compare:
+        regressions = compare(report, load_baseline(args.compare))
+        for line in regressions:
+            print(f'РЕГРЕССИЯ {line}')
+        return 1 if regressions else 0
+    return 0
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        setup(directory)
+        return run()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Сравнение кешей: python -m benchmarks.cache --ops 20000 --processes 4."""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import django
+
+PAYLOAD = 'x' * 4096
+
+
+def make_caches(location):
+    from django.core.cache.backends.locmem import LocMemCache
+
+    from core.cache import SQLiteCache
+
+    params = {'OPTIONS': {'MAX_ENTRIES': 100000}}
+    return {
+        'locmem': LocMemCache('benchmark', params),
+        'sqlite': SQLiteCache(location, params),
+    }
+
+
+def operations(cache, ops):
+    """Время одной операции каждого вида в микросекундах."""
+    keys = [f'key:{number}' for number in range(ops)]
+    cache.set('counter', 0, None)
+    timings = {}
+    for name, run in (
+        ('set', lambda key: cache.set(key, PAYLOAD)),
+        ('get_hit', lambda key: cache.get(key)),
+        ('get_miss', lambda key: cache.get('missing:' + key)),
+        ('incr', lambda key: cache.incr('counter')),
+    ):
+        started = time.perf_counter()
+        for key in keys:
+            run(key)
+        timings[name] = (time.perf_counter() - started) / ops * 1e6
+    started = time.perf_counter()
+    for start in range(0, ops, 10):
+        cache.get_many(keys[start:start + 10])
+    timings['get_many_10'] = (time.perf_counter() - started) / ops * 1e7
+    cache.clear()
+    return timings
+
+
+def worker(location, ops, queue):
+    django.setup()
+    from core.cache import SQLiteCache
+
+    cache = SQLiteCache(location, {})
+    started = time.perf_counter()
+    for number in range(ops):
+        key = f'shared:{number % 500}'
+        if number % 10 == 0:
+            cache.set(key, PAYLOAD)
+        else:
+            cache.get(key)
+    queue.put(ops / (time.perf_counter() - started))
+
+
+def shared(location, ops, processes):
+    """Суммарные операции/с для processes процессов на одном файле."""
+    queue = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=worker, args=(location, ops, queue))
+        for _ in range(processes)
+    ]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    return sum(queue.get() for _ in workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.cache')
+    parser.add_argument('--ops', type=int, default=20000)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    django.setup()
+    with tempfile.TemporaryDirectory() as directory:
+        location = os.path.join(directory, 'cache.sqlite3')
+        results = {
+            name: operations(cache, args.ops)
+            for name, cache in make_caches(location).items()
+        }
+        names = list(results['locmem'])
+        print('{:<10}'.format('мкс/оп') + ''.join(
+            f'{name:>13}' for name in names
+        ))
+        for backend, timings in results.items():
+            print(f'{backend:<10}' + ''.join(
+                f'{timings[name]:>13.1f}' for name in names
+            ))
+        throughput = shared(location, args.ops, args.processes)
+        print(f'sqlite, {args.processes} процесса(ов), 90% чтений: '
+              f'{throughput:.0f} оп/с')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import random
+
+from django.contrib.auth import get_user_model
+from mixer.backend.django import mixer
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+SCALES = {
+    'small': {
+        'users': 20, 'groups': 5, 'posts': 200,
+        'comments': 400, 'follows': 5,
+    },
+    'medium': {
+        'users': 200, 'groups': 20, 'posts': 5000,
+        'comments': 10000, 'follows': 20,
+    },
+    'large': {
+        'users': 1000, 'groups': 50, 'posts': 50000,
+        'comments': 100000, 'follows': 50,
+    },
+}
+
+
+def seed(users, groups, posts, comments, follows, rnd=None):
+    """Заполняет базу через mixer: сигналы и счётчики работают как в жизни.
+
+    Возвращает состояние для сценариев: первый пользователь — читатель,
+    подписанный на follows авторов.
+    """
+    rnd = rnd or random.Random(0)
+    people = mixer.cycle(users).blend(
+        User, username=mixer.sequence('bench{0}')
+    )
+    communities = mixer.cycle(groups).blend(
+        Group, slug=mixer.sequence('bench-group-{0}')
+    )
+    post_list = mixer.cycle(posts).blend(
+        Post,
+        author=(rnd.choice(people) for _ in range(posts)),
+        group=(rnd.choice(communities + [None]) for _ in range(posts)),
+    )
+    mixer.cycle(comments).blend(
+        Comment,
+        author=(rnd.choice(people) for _ in range(comments)),
+        post=(rnd.choice(post_list) for _ in range(comments)),
+    )
+    pairs = [
+        (user, author)
+        for user in people
+        for author in rnd.sample(people, min(follows, users))
+        if author != user
+    ]
+    mixer.cycle(len(pairs)).blend(
+        Follow,
+        user=(user for user, _ in pairs),
+        author=(author for _, author in pairs),
+    )
+    reader = people[0]
+    return {
+        'reader': reader,
+        'usernames': [user.username for user in people],
+        'slugs': [group.slug for group in communities],
+        'post_ids': [post.pk for post in post_list],
+        'own_post_ids': [
+            post.pk for post in post_list if post.author_id == reader.pk
+        ],
+    }
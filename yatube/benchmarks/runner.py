@@ -0,0 +1,107 @@
+import json
+import math
+import os
+import random
+import time
+from collections import defaultdict
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from .scenarios import ANONYMOUS_SHARE
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+# Насколько p95 может вырасти относительно базовой линии.
+P95_TOLERANCE = 0.25
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу: share в долях единицы."""
+    ordered = sorted(values)
+    rank = max(math.ceil(share * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(latencies, queries, elapsed):
+    return {
+        'count': len(latencies),
+        'p50': round(percentile(latencies, 0.50), 3),
+        'p95': round(percentile(latencies, 0.95), 3),
+        'p99': round(percentile(latencies, 0.99), 3),
+        'queries': round(sum(queries) / len(queries), 2),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0,
+    }
+
+
+def replay(mix, state, requests, rnd=None):
+    """Прогоняет requests запросов из смеси mix через весь стек Django.
+
+    Задержки считаются в миллисекундах, отдельно по каждому endpoint
+    и итогом в ключе 'total'. Кеш не чистится: холодный старт даёт
+    собственный кеш прогона (см. benchmarks.__main__.setup).
+    """
+    rnd = rnd or random.Random(0)
+    anonymous = Client()
+    reader = Client()
+    reader.force_login(state['reader'])
+    weights = [endpoint.weight for endpoint in mix]
+    latencies = defaultdict(list)
+    queries = defaultdict(list)
+    spent = defaultdict(float)
+    for endpoint in rnd.choices(mix, weights, k=requests):
+        url, data = endpoint.build(state, rnd)
+        if endpoint.login is None and rnd.random() < ANONYMOUS_SHARE:
+            client = anonymous
+        else:
+            client = reader
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = getattr(client, endpoint.method)(url, data)
+            duration = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise AssertionError(
+                f'{endpoint.name}: {url} вернул {response.status_code}'
+            )
+        for name in (endpoint.name, 'total'):
+            latencies[name].append(duration * 1000)
+            queries[name].append(len(context))
+            spent[name] += duration
+    return {
+        name: summarize(latencies[name], queries[name], spent[name])
+        for name in latencies
+    }
+
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f'{name}.json')
+
+
+def save_baseline(name, report):
+    with open(baseline_path(name), 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def load_baseline(name):
+    with open(baseline_path(name), encoding='utf-8') as file:
+        return json.load(file)
+
+
+def compare(report, baseline, tolerance=P95_TOLERANCE):
+    """Список регрессий: рост p95 сверх допуска или числа запросов."""
+    regressions = []
+    for name, current in sorted(report.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current['p95'] > previous['p95'] * (1 + tolerance):
+            regressions.append(
+                f'{name}: p95 {previous["p95"]} -> {current["p95"]} мс'
+            )
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{name}: запросов {previous["queries"]} -> '
+                f'{current["queries"]}'
+            )
+    return regressions
@@ -0,0 +1,82 @@
+from collections import namedtuple
+
+from django.urls import reverse
+
+Endpoint = namedtuple('Endpoint', 'name weight method login build')
+
+# Доля анонимных запросов среди страниц чтения.
+ANONYMOUS_SHARE = 0.5
+
+
+def _index(state, rnd):
+    return reverse('posts:index'), None
+
+
+def _group_list(state, rnd):
+    slug = rnd.choice(state['slugs'])
+    return reverse('posts:group_list', kwargs={'slug': slug}), None
+
+
+def _profile(state, rnd):
+    username = rnd.choice(state['usernames'])
+    return reverse('posts:profile', kwargs={'username': username}), None
+
+
+def _post_detail(state, rnd):
+    post_id = rnd.choice(state['post_ids'])
+    return reverse('posts:post_detail', kwargs={'post_id': post_id}), None
+
+
+def _follow_index(state, rnd):
+    return reverse('posts:follow_index'), None
+
+
+def _post_create(state, rnd):
+    return reverse('posts:post_create'), {'text': f'Пост {rnd.random()}'}
+
+
+def _post_edit(state, rnd):
+    post_id = rnd.choice(state['own_post_ids'] or state['post_ids'])
+    url = reverse('posts:post_edit', kwargs={'post_id': post_id})
+    return url, {'text': f'Правка {rnd.random()}'}
+
+
+def _add_comment(state, rnd):
+    post_id = rnd.choice(state['post_ids'])
+    url = reverse('posts:add_comment', kwargs={'post_id': post_id})
+    return url, {'text': f'Комментарий {rnd.random()}'}
+
+
+def _profile_follow(state, rnd):
+    username = rnd.choice(state['usernames'])
+    return reverse('posts:profile_follow', kwargs={'username': username}), None
+
+
+def _profile_unfollow(state, rnd):
+    username = rnd.choice(state['usernames'])
+    url = reverse('posts:profile_unfollow', kwargs={'username': username})
+    return url, None
+
+
+# login: True — только читатель, None — читатель или аноним.
+MIXES = {
+    'read': (
+        Endpoint('index', 35, 'get', None, _index),
+        Endpoint('group_list', 15, 'get', None, _group_list),
+        Endpoint('profile', 20, 'get', None, _profile),
+        Endpoint('post_detail', 20, 'get', None, _post_detail),
+        Endpoint('follow_index', 10, 'get', True, _follow_index),
+    ),
+    'mixed': (
+        Endpoint('index', 30, 'get', None, _index),
+        Endpoint('group_list', 12, 'get', None, _group_list),
+        Endpoint('profile', 15, 'get', None, _profile),
+        Endpoint('post_detail', 18, 'get', None, _post_detail),
+        Endpoint('follow_index', 10, 'get', True, _follow_index),
+        Endpoint('post_create', 4, 'post', True, _post_create),
+        Endpoint('post_edit', 2, 'post', True, _post_edit),
+        Endpoint('add_comment', 5, 'post', True, _add_comment),
+        Endpoint('profile_follow', 2, 'get', True, _profile_follow),
+        Endpoint('profile_unfollow', 2, 'get', True, _profile_unfollow),
+    ),
+}
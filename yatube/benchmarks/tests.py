@@ -0,0 +1,36 @@
+import random
+
+from django.test import TestCase
+
+from .data import seed
+from .runner import compare, percentile, replay
+from .scenarios import MIXES
+
+
+class BenchmarkTests(TestCase):
+    def test_percentile(self):
+        """Перцентиль считается по ближайшему рангу."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.95), 7)
+
+    def test_replay_reports_every_endpoint(self):
+        """Прогон смеси даёт метрики по каждому endpoint и итог."""
+        rnd = random.Random(1)
+        state = seed(
+            users=5, groups=2, posts=20, comments=20, follows=2, rnd=rnd
+        )
+        report = replay(MIXES['mixed'], state, 100, rnd)
+        self.assertEqual(report['total']['count'], 100)
+        for row in report.values():
+            self.assertLessEqual(row['p50'], row['p95'])
+            self.assertLessEqual(row['p95'], row['p99'])
+            self.assertGreater(row['queries'], 0)
+
+    def test_compare_flags_regressions(self):
+        """Сравнение с базовой линией ловит рост p95 и числа запросов."""
+        baseline = {'index': {'p95': 10.0, 'queries': 2.0}}
+        self.assertEqual(compare(baseline, baseline), [])
+        slower = {'index': {'p95': 20.0, 'queries': 3.0}}
+        self.assertEqual(len(compare(slower, baseline)), 2)
@@ -0,0 +1,132 @@
+"""Конкурентная запись в SQLite: python -m benchmarks.writes --workers 1 2 4.
+
+Каждый воркер — отдельный процесс со своим соединением, как воркер
+gunicorn. Он чередует post_create и add_comment через весь стек Django.
+Сравниваются стандартный бэкенд sqlite3 без постоянных соединений и
+core.sqlite с WAL, прагмами и повтором при SQLITE_BUSY.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+
+import django
+
+BACKENDS = {
+    'sqlite3': {
+        'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 0,
+    },
+    'core.sqlite': {
+        'ENGINE': 'core.sqlite', 'CONN_MAX_AGE': None,
+    },
+}
+
+
+def setup(backend, name):
+    """Django с базой name; вызывается в процессе до любых запросов."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    from django.conf import settings
+
+    settings.DATABASES['default'].update(BACKENDS[backend], NAME=name)
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+    django.setup()
+
+
+def prepare(backend, name, queue):
+    setup(backend, name)
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from posts.models import Post
+
+    call_command('migrate', verbosity=0)
+    user = get_user_model().objects.create_user(username='writer')
+    post = Post.objects.create(author=user, text='Пост для комментариев')
+    queue.put((user.pk, post.pk))
+
+
+def worker(backend, name, user_id, post_id, requests, queue):
+    setup(backend, name)
+    # Ошибки считаются в итоге, трассировки django.request не нужны.
+    logging.disable(logging.CRITICAL)
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client()
+    create_url = reverse('posts:post_create')
+    comment_url = reverse('posts:add_comment', args=[post_id])
+    errors = 0
+    try:
+        # Вход — тоже запись (сессия) и тоже может упасть на блокировке.
+        client.force_login(get_user_model().objects.get(pk=user_id))
+        for number in range(requests):
+            url = comment_url if number % 2 else create_url
+            try:
+                response = client.post(url, {'text': f'Запись {number}'})
+            except Exception:
+                errors += 1
+                continue
+            if response.status_code != 302:
+                errors += 1
+    except Exception:
+        errors = requests
+    finally:
+        queue.put((requests - errors, errors))
+
+
+def run(backend, directory, workers, requests):
+    """(успешных записей в секунду, ошибок) для workers процессов."""
+    name = os.path.join(directory, f'{backend}-{workers}.sqlite3')
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=prepare, args=(backend, name, queue)
+    )
+    process.start()
+    user_id, post_id = queue.get()
+    process.join()
+    processes = [
+        multiprocessing.Process(
+            target=worker,
+            args=(backend, name, user_id, post_id, requests, queue),
+        )
+        for _ in range(workers)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+    done = sum(result[0] for result in results)
+    return done / elapsed, sum(result[1] for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.writes')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--requests', type=int, default=200,
+                        help='записей на воркер')
+    args = parser.parse_args()
+    print('{:<14}{:>8}{:>12}{:>8}'.format(
+        'бэкенд', 'воркеры', 'записей/с', 'ошибки'
+    ))
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in BACKENDS:
+            for workers in args.workers:
+                throughput, errors = run(
+                    backend, directory, workers, args.requests
+                )
+                print(f'{backend:<14}{workers:>8}{throughput:>12.1f}'
+                      f'{errors:>8}')
+
+
+if __name__ == '__main__':
+    main()
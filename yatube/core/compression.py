@@ -0,0 +1,45 @@
+import re
+from functools import wraps
+
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Короткие ответы сжимать дороже, чем отправить как есть.
+MIN_SIZE = 200
+
+re_accepts_gzip = re.compile(r'\bgzip\b')
+re_accepts_brotli = re.compile(r'\bbr\b')
+
+
+def compress_response(view_func):
+    """Сжимает ответ view brotli, если он установлен, иначе gzip.
+
+    Для API, а не для HTML: в JSON нет CSRF-токенов, так что BREACH
+    здесь не грозит.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        if (response.streaming or response.has_header('Content-Encoding')
+                or len(response.content) < MIN_SIZE):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if brotli is not None and re_accepts_brotli.search(accept):
+            content, encoding = brotli.compress(response.content), 'br'
+        elif re_accepts_gzip.search(accept):
+            content, encoding = compress_string(response.content), 'gzip'
+        else:
+            return response
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        return response
+    return wrapper
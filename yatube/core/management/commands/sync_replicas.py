@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.routers import mark_synced, replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплики через backup API: '
+        'локальная замена репликации СУБД.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять каждые столько секунд; 0 — один раз.',
+        )
+
+    def handle(self, *args, **options):
+        aliases = replicas()
+        if not aliases:
+            raise CommandError(
+                'Реплики не настроены: задайте YATUBE_REPLICA_DB.'
+            )
+        primary = connections[DEFAULT_DB_ALIAS]
+        if any(
+            connections[alias].vendor != 'sqlite'
+            for alias in [DEFAULT_DB_ALIAS, *aliases]
+        ):
+            raise CommandError('Копирование доступно только для SQLite.')
+        while True:
+            primary.ensure_connection()
+            for alias in aliases:
+                replica = connections[alias]
+                replica.ensure_connection()
+                started = int(time.time() * 1000)
+                primary.connection.backup(replica.connection)
+                mark_synced(alias, started)
+                self.stdout.write(f'{alias}: скопирована')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
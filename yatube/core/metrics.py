@@ -0,0 +1,210 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+Sample = namedtuple(
+    'Sample',
+    'view status duration queries db_time template_time '
+    'cache_hits cache_misses size',
+)
+
+QUANTILES = (0.5, 0.95, 0.99)
+# Поля Sample, которые суммируются в счётчики _sum.
+TOTALS = (
+    'duration', 'queries', 'db_time', 'template_time',
+    'cache_hits', 'cache_misses', 'size',
+)
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Счётчики одного запроса: SQL, шаблоны и фрагментный кеш."""
+
+    def __init__(self, capture_sql=False):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.sql = [] if capture_sql else None
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += elapsed
+            if self.sql is not None:
+                self.sql.append((elapsed, sql))
+
+    @contextmanager
+    def collect(self):
+        _local.metrics = self
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(self.execute)
+                    )
+                yield self
+        finally:
+            _local.metrics = None
+
+
+def current():
+    return getattr(_local, 'metrics', None)
+
+
+def record_template(elapsed):
+    metrics = current()
+    if metrics is not None:
+        metrics.template_time += elapsed
+
+
+def record_cache(hit):
+    metrics = current()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+class MetricsBuffer:
+    """Кольцевой буфер последних запросов процесса и счётчики с его старта.
+
+    Квантили считаются по буферу, а _sum, _count и ответы по кодам — по
+    счётчикам: они только растут, как того ждёт Prometheus.
+    """
+
+    def __init__(self, size):
+        self._lock = threading.Lock()
+        self.samples = deque(maxlen=size)
+        self.totals = {}
+
+    def add(self, sample):
+        with self._lock:
+            self.samples.append(sample)
+            totals = self.totals.setdefault(sample.view, {
+                'count': 0, 'statuses': {}, **dict.fromkeys(TOTALS, 0),
+            })
+            totals['count'] += 1
+            for field in TOTALS:
+                totals[field] += getattr(sample, field)
+            statuses = totals['statuses']
+            statuses[sample.status] = statuses.get(sample.status, 0) + 1
+
+    def snapshot(self):
+        """Копия буфера и счётчиков: (samples, totals)."""
+        with self._lock:
+            return list(self.samples), {
+                view: dict(totals, statuses=dict(totals['statuses']))
+                for view, totals in self.totals.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self.samples.clear()
+            self.totals.clear()
+
+
+buffer = MetricsBuffer(settings.METRICS_BUFFER_SIZE)
+
+
+def log_slow_request(request, duration, metrics):
+    queries = '\n'.join(
+        f'{elapsed * 1000:.1f} мс: {sql}' for elapsed, sql in metrics.sql
+    )
+    logger.warning(
+        'Медленный запрос %s %s: %.1f мс, SQL %d (%.1f мс)\n%s',
+        request.method, request.get_full_path(), duration * 1000,
+        metrics.queries, metrics.db_time * 1000, queries,
+    )
+
+
+def _quantile(values, share):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(share * len(ordered)), 1) - 1]
+
+
+def _by_view(samples):
+    views = OrderedDict()
+    for sample in sorted(samples, key=lambda sample: sample.view):
+        views.setdefault(sample.view, []).append(sample)
+    return views
+
+
+def _label(view, **extra):
+    labels = [f'view="{view}"']
+    labels += [f'{name}="{value}"' for name, value in extra.items()]
+    return '{' + ','.join(labels) + '}'
+
+
+def render_prometheus(samples, totals):
+    """Метрики в текстовом формате Prometheus.
+
+    Квантили — по окну последних запросов samples, _sum и _count — по
+    накопленным totals. Всё считается в одном процессе: при нескольких
+    воркерах каждый отдаёт свои числа, и суммировать их нужно на
+    стороне Prometheus.
+    """
+    views = _by_view(samples)
+    lines = [
+        '# HELP yatube_request_duration_seconds Время ответа view.',
+        '# TYPE yatube_request_duration_seconds summary',
+    ]
+    for view, counters in sorted(totals.items()):
+        durations = [row.duration for row in views.get(view, ())]
+        for share in QUANTILES if durations else ():
+            lines.append(
+                'yatube_request_duration_seconds'
+                f'{_label(view, quantile=share)} '
+                f'{_quantile(durations, share):.6f}'
+            )
+        lines.append(
+            f'yatube_request_duration_seconds_sum{_label(view)} '
+            f'{counters["duration"]:.6f}'
+        )
+        lines.append(
+            f'yatube_request_duration_seconds_count{_label(view)} '
+            f'{counters["count"]}'
+        )
+    summaries = (
+        ('db_queries', 'queries', 'Число SQL-запросов.'),
+        ('db_duration_seconds', 'db_time', 'Время в базе данных.'),
+        ('template_duration_seconds', 'template_time',
+         'Время рендеринга шаблонов.'),
+        ('feed_cache_hits', 'cache_hits', 'Попадания во фрагментный кеш.'),
+        ('feed_cache_misses', 'cache_misses', 'Промахи фрагментного кеша.'),
+        ('response_size_bytes', 'size', 'Размер тела ответа.'),
+    )
+    for name, field, help_text in summaries:
+        lines.append(f'# HELP yatube_{name} {help_text}')
+        lines.append(f'# TYPE yatube_{name} summary')
+        for view, counters in sorted(totals.items()):
+            lines.append(
+                f'yatube_{name}_sum{_label(view)} {counters[field]:g}'
+            )
+            lines.append(
+                f'yatube_{name}_count{_label(view)} {counters["count"]}'
+            )
+    lines.append('# HELP yatube_responses_total Ответы по коду статуса.')
+    lines.append('# TYPE yatube_responses_total counter')
+    for view, counters in sorted(totals.items()):
+        for status, count in sorted(counters['statuses'].items()):
+            lines.append(
+                f'yatube_responses_total{_label(view, status=status)} {count}'
+            )
+    return '\n'.join(lines) + '\n'
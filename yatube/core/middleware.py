@@ -0,0 +1,58 @@
+import time
+
+from django.conf import settings
+
+from . import metrics, routers
+
+
+class MetricsMiddleware:
+    """Собирает метрики каждого запроса в кольцевой буфер процесса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        slow_ms = settings.METRICS_SLOW_REQUEST_MS
+        request_metrics = metrics.RequestMetrics(
+            capture_sql=slow_ms is not None
+        )
+        started = time.perf_counter()
+        with request_metrics.collect():
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        if view == 'metrics':
+            return response
+        metrics.buffer.add(metrics.Sample(
+            view=view,
+            status=response.status_code,
+            duration=duration,
+            queries=request_metrics.queries,
+            db_time=request_metrics.db_time,
+            template_time=request_metrics.template_time,
+            cache_hits=request_metrics.cache_hits,
+            cache_misses=request_metrics.cache_misses,
+            size=0 if response.streaming else len(response.content),
+        ))
+        if slow_ms is not None and duration * 1000 >= slow_ms:
+            metrics.log_slow_request(request, duration, request_metrics)
+        return response
+
+
+class ReplicaPinMiddleware:
+    """После записи читает из основной базы, пока реплика догоняет."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.reset_writes()
+        response = self.get_response(request)
+        if routers.wrote() and routers.replicas():
+            response.set_cookie(
+                routers.PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,36 @@
+from urllib.parse import urlsplit
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+
+def query_budget(max_queries):
+    """Объявляет, сколько SQL-запросов может сделать view за запрос."""
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+class QueryBudgetMixin:
+    """Проверка для TestCase: view укладывается в объявленный бюджет."""
+
+    def assertWithinQueryBudget(self, url, client=None, method='get',
+                                data=None):
+        view = resolve(urlsplit(url).path).func
+        budget = getattr(view, 'query_budget', None)
+        if budget is None:
+            self.fail(f'Для {view.__name__} не объявлен query_budget.')
+        client = client or self.client
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(url, data)
+        if len(context) > budget:
+            queries = '\n'.join(
+                query['sql'] for query in context.captured_queries
+            )
+            self.fail(
+                f'{view.__name__}: {len(context)} запросов '
+                f'при бюджете {budget}:\n{queries}'
+            )
+        return response
@@ -0,0 +1,96 @@
+import random
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+# Кука, с которой чтения идут в основную базу: ставится после записи.
+PIN_COOKIE = 'primary_pin'
+# Когда (мс) началось последнее копирование реплики: см. sync_replicas.
+SYNCED_KEY = 'replica:synced:{}'
+# Приложения, чтения которых можно отдать реплике. Сессии и
+# пользователи читаются из основной базы: только что вошедший
+# пользователь не должен стать анонимом, пока реплика отстаёт.
+REPLICA_APPS = {'posts'}
+
+_local = threading.local()
+
+
+def replicas():
+    return list(settings.DATABASE_REPLICAS)
+
+
+def read_alias():
+    return getattr(_local, 'read_alias', None)
+
+
+def synced_at():
+    """Когда скопирована реплика, из которой читает поток, в мс.
+
+    None — поток читает из основной базы, 0 — реплика без отметки
+    о копировании.
+    """
+    if read_alias() is None:
+        return None
+    return getattr(_local, 'synced_at', 0)
+
+
+def mark_synced(alias, started):
+    cache.set(SYNCED_KEY.format(alias), started, None)
+
+
+class ReplicaRouter:
+    """Чтения моделей REPLICA_APPS внутри replica_reads — из реплики.
+
+    Записи всегда идут в основную базу и отмечаются в потоке, чтобы
+    ReplicaPinMiddleware закрепил автора за ней. Миграции применяются
+    только к основной базе: реплика — её копия.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in REPLICA_APPS:
+            return read_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def replica_reads(view_func):
+    """Отправляет чтения GET-запроса к view в случайную реплику.
+
+    Без реплик, для записи и для клиента с PIN_COOKIE view читает из
+    основной базы: автор сразу видит свой пост или комментарий, даже
+    если реплика ещё отстаёт.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        aliases = replicas()
+        if (not aliases or request.method not in ('GET', 'HEAD')
+                or PIN_COOKIE in request.COOKIES):
+            return view_func(request, *args, **kwargs)
+        alias = random.choice(aliases)
+        _local.read_alias = alias
+        _local.synced_at = cache.get(SYNCED_KEY.format(alias), 0)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _local.read_alias = None
+    return wrapper
+
+
+def reset_writes():
+    _local.wrote = False
+
+
+def wrote():
+    return getattr(_local, 'wrote', False)
@@ -0,0 +1,73 @@
+"""SQLite для продакшена: прагмы при подключении и повтор при SQLITE_BUSY.
+
+Подключается как ENGINE 'core.sqlite'; OPTIONS['pragmas'] дополняет и
+переопределяет PRAGMAS.
+"""
+import random
+import time
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    # Читатели не ждут писателя, писатель не ждёт читателей.
+    'journal_mode': 'wal',
+    # В WAL fsync только на контрольной точке: коммит не теряет
+    # целостности, при сбое питания теряются лишь последние коммиты.
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    # Отрицательное значение — в килобайтах: 64 МБ на соединение.
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.01
+
+
+def is_busy(error):
+    message = str(error)
+    return (
+        'database is locked' in message
+        or 'database table is locked' in message
+    )
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pragmas = dict(PRAGMAS)
+        self.execute_wrappers.append(self.retry_busy)
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = {**PRAGMAS, **kwargs.pop('pragmas', {})}
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        # Блокировка записи берётся сразу: транзакция, начатая чтением,
+        # при первой записи получила бы SQLITE_BUSY без ожидания.
+        self.cursor().execute('BEGIN IMMEDIATE')
+
+    def retry_busy(self, execute, sql, params, many, context):
+        """Повторяет запрос вне транзакции с растущей паузой.
+
+        Внутри atomic повтор одного запроса не поможет: транзакцию
+        откатывают и начинают заново целиком.
+        """
+        delay = BUSY_BACKOFF
+        for attempt in range(BUSY_RETRIES):
+            try:
+                return execute(sql, params, many, context)
+            except OperationalError as error:
+                if (self.in_atomic_block or not is_busy(error)
+                        or attempt == BUSY_RETRIES - 1):
+                    raise
+            time.sleep(delay * (1 + random.random()))
+            delay *= 2
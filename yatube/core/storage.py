@@ -0,0 +1,47 @@
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASHED_NAME = re.compile(r'(?:^|/)([0-9a-f]{2})/\1[0-9a-f]{62}(?:\.\w+)?$')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файлы под именем из sha256 содержимого: одна копия на хеш.
+
+    Каталог из upload_to сохраняется: posts/3f/3fa2….jpg. Если такой файл
+    уже есть, save() ничего не пишет и возвращает его имя. Содержимое по
+    имени никогда не меняется, так что файл можно отдавать с
+    Cache-Control: immutable. Удалить файл, на который не осталось
+    ссылок, — забота владельца; повторная запись обновляет время
+    изменения файла, чтобы владелец не удалил его, пока новая ссылка
+    не сохранена.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, digest[:2], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+    @staticmethod
+    def is_hashed(name):
+        return bool(name and HASHED_NAME.search(name))
@@ -0,0 +1,15 @@
+from django.test.runner import DiscoverRunner
+
+from .testing import isolate_caches, remove_caches
+
+
+class IsolatedCacheRunner(DiscoverRunner):
+    """Запускает тесты с кешами во временном каталоге."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_directory = isolate_caches()
+
+    def teardown_test_environment(self, **kwargs):
+        remove_caches(self.cache_directory)
+        super().teardown_test_environment(**kwargs)
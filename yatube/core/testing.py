@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SQLITE_CACHE = 'core.cache.SQLiteCache'
+
+
+def isolate_caches():
+    """Переносит кеши SQLiteCache во временный каталог, возвращает его.
+
+    Тесты чистят кеш через cache.clear(): файл сервера им не достаётся,
+    а сам бэкенд остаётся настоящим.
+    """
+    directory = tempfile.mkdtemp(prefix='yatube-cache-')
+    for alias, params in settings.CACHES.items():
+        if params['BACKEND'] == SQLITE_CACHE:
+            params['LOCATION'] = os.path.join(directory, f'{alias}.sqlite3')
+    # Уже созданные в этом потоке экземпляры смотрят на старый файл.
+    caches._caches.caches = {}
+    return directory
+
+
+def remove_caches(directory):
+    caches._caches.caches = {}
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@contextmanager
+def run_on_commit(using=DEFAULT_DB_ALIAS):
+    """Выполняет on_commit, добавленные внутри блока.
+
+    TestCase держит тест в незакоммиченной транзакции, и Django 2.2 такие
+    колбэки не запускает; это аналог captureOnCommitCallbacks(execute=True)
+    из Django 3.2.
+    """
+    start = len(connections[using].run_on_commit)
+    yield
+    for _, callback in connections[using].run_on_commit[start:]:
+        callback()
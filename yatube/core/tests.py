@@ -1,6 +1,31 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
 from http import HTTPStatus
+from unittest import mock
 
-from django.test import TestCase
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.files.base import ContentFile
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import OperationalError, connection, router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts import feed_cache
+from posts.models import Post
+from posts.response_cache import cache_anonymous, index_scopes
+
+from . import cache as shared_cache
+from . import metrics, routers
+from .sqlite.base import DatabaseWrapper
+from .storage import ContentAddressedStorage
+from .testing import run_on_commit
+from .views import media
 
 
 class ViewTestClass(TestCase):
@@ -8,3 +33,315 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertTemplateUsed(response, 'core/404.html')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.buffer.clear()
+
+    def test_metrics_endpoint(self):
+        """Метрики по view отдаются в формате Prometheus."""
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        for line in (
+            'yatube_request_duration_seconds_count{view="posts:index"} 1',
+            'yatube_db_queries_count{view="posts:index"} 1',
+            'yatube_responses_total{view="posts:index",status="200"} 1',
+        ):
+            self.assertIn(line, body)
+        self.assertNotIn('view="metrics"', body)
+
+    def test_counts_outlive_buffer(self):
+        """_count растёт и после того, как буфер заполнился."""
+        buffer = metrics.MetricsBuffer(2)
+        sample = metrics.Sample('posts:index', 200, 0.5, 1, 0, 0, 0, 1, 10)
+        for _ in range(3):
+            buffer.add(sample)
+        samples, totals = buffer.snapshot()
+        self.assertEqual(len(samples), 2)
+        body = metrics.render_prometheus(samples, totals)
+        for line in (
+            'yatube_request_duration_seconds_count{view="posts:index"} 3',
+            'yatube_request_duration_seconds_sum{view="posts:index"} 1.5',
+            'yatube_response_size_bytes_sum{view="posts:index"} 30',
+        ):
+            self.assertIn(line, body)
+
+    def test_sample_contents(self):
+        """В буфер попадают запросы, шаблоны, кеш и размер ответа."""
+        response = self.client.get(reverse('posts:index'))
+        (sample,), _ = metrics.buffer.snapshot()
+        self.assertEqual(sample.view, 'posts:index')
+        self.assertGreater(sample.queries, 0)
+        self.assertGreater(sample.template_time, 0)
+        self.assertEqual(sample.cache_misses, 1)
+        self.assertEqual(sample.size, len(response.content))
+
+    def test_metrics_forbidden_for_outsiders(self):
+        """Чужим адресам метрики не отдаются."""
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    @override_settings(METRICS_SLOW_REQUEST_MS=0)
+    def test_slow_request_log(self):
+        """Медленный запрос пишется в лог вместе с SQL."""
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('SELECT', logs.output[0])
+
+
+class SQLiteCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        cls.location = os.path.join(cls.directory, 'cache.sqlite3')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def make_cache(self, **options):
+        return shared_cache.SQLiteCache(self.location, {'OPTIONS': options})
+
+    def setUp(self):
+        self.cache = self.make_cache()
+        self.cache.clear()
+
+    def test_tests_use_own_cache_file(self):
+        """Тесты работают с настоящим SQLiteCache, но не с файлом сервера."""
+        default = caches['default']
+        self.assertIsInstance(default, shared_cache.SQLiteCache)
+        self.assertNotEqual(
+            os.path.dirname(default._location), settings.BASE_DIR
+        )
+
+    def test_basic_api(self):
+        """Кеш поддерживает основные операции Django."""
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertTrue(self.cache.add('new', 'value'))
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 5), 6)
+        self.assertEqual(
+            self.cache.get_many(['key', 'new', 'missing']),
+            {'key': {'value': 1}, 'new': 'value'},
+        )
+        self.assertTrue(self.cache.delete('key'))
+        self.assertIsNone(self.cache.get('key'))
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_get_many_over_variable_limit(self):
+        """get_many больше 999 ключей разбивается на несколько SELECT."""
+        cache = self.make_cache(MAX_ENTRIES=2000)
+        cache._db.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        cache.set_many({f'key{n}': n for n in range(1200)})
+        found = cache.get_many(f'key{n}' for n in range(1200))
+        self.assertEqual(len(found), 1200)
+
+    def test_ttl(self):
+        """Просроченная запись не отдаётся и может быть добавлена заново."""
+        self.cache.set('key', 'value', 10)
+        with mock.patch('time.time', return_value=time.time() + 11):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertFalse(self.cache.has_key('key'))
+            self.assertTrue(self.cache.add('key', 'fresh'))
+
+    def test_shared_between_instances(self):
+        """Два экземпляра на одном файле видят записи друг друга."""
+        other = self.make_cache()
+        self.cache.set('version', 1, None)
+        other.incr('version')
+        self.assertEqual(self.cache.get('version'), 2)
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняются давно не читавшиеся записи."""
+        cache = self.make_cache(MAX_ENTRIES=10, CULL_FREQUENCY=2)
+        with mock.patch('time.time', return_value=1000.0):
+            cache.set('hot', 'value', None)
+        for number in range(shared_cache.CULL_EVERY - 2):
+            with mock.patch('time.time', return_value=2000.0 + number):
+                cache.set(f'key{number}', number, None)
+        with mock.patch('time.time', return_value=5000.0):
+            cache.get('hot')
+            cache.set('last', 'value', None)
+        self.assertEqual(cache.get('hot'), 'value')
+        self.assertIsNone(cache.get('key0'))
+        self.assertLessEqual(
+            len(cache.get_many(f'key{n}' for n in range(100))), 50
+        )
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+        self.storage = ContentAddressedStorage(self.location)
+
+    def test_one_copy_per_content(self):
+        """Одинаковое содержимое сохраняется одним файлом по хешу."""
+        first = self.storage.save('posts/a.GIF', ContentFile(b'content'))
+        second = self.storage.save('posts/b.gif', ContentFile(b'content'))
+        self.assertEqual(first, second)
+        self.assertRegex(first, r'^posts/([0-9a-f]{2})/\1[0-9a-f]{62}\.gif$')
+        self.assertTrue(ContentAddressedStorage.is_hashed(first))
+        self.assertFalse(ContentAddressedStorage.is_hashed('posts/a.gif'))
+        self.assertNotEqual(
+            self.storage.save('posts/c.gif', ContentFile(b'other')), first
+        )
+
+    def test_media_immutable(self):
+        """Файлы по хешу отдаются с Cache-Control: immutable."""
+        name = self.storage.save('posts/a.gif', ContentFile(b'content'))
+        plain_path = os.path.join(self.location, 'posts', 'plain.gif')
+        with open(plain_path, 'wb') as plain_file:
+            plain_file.write(b'x')
+        factory = RequestFactory()
+        with override_settings(MEDIA_ROOT=self.location):
+            hashed = media(factory.get('/media/' + name), name)
+            plain = media(factory.get('/media/'), 'posts/plain.gif')
+        self.assertIn('immutable', hashed['Cache-Control'])
+        self.assertFalse(plain.has_header('Cache-Control'))
+
+
+class SQLiteBackendTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.wrapper = DatabaseWrapper({
+            **connection.settings_dict,
+            'NAME': os.path.join(directory, 'db.sqlite3'),
+            'OPTIONS': {'pragmas': {'cache_size': -2000}},
+        }, alias='tuned')
+        self.addCleanup(self.wrapper.close)
+
+    def pragma(self, name):
+        self.wrapper.ensure_connection()
+        return self.wrapper.connection.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def test_pragmas(self):
+        """Новое соединение получает WAL и прагмы из OPTIONS."""
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -2000)
+
+    @mock.patch('core.sqlite.base.time.sleep')
+    def test_retry_busy(self, sleep):
+        """Вне транзакции запрос повторяется при SQLITE_BUSY."""
+        execute = mock.Mock(side_effect=[
+            OperationalError('database is locked'), 'result',
+        ])
+        self.assertEqual(
+            self.wrapper.retry_busy(execute, 'SELECT 1', None, False, {}),
+            'result',
+        )
+        self.assertEqual(sleep.call_count, 1)
+        execute = mock.Mock(side_effect=OperationalError('database is locked'))
+        self.wrapper.in_atomic_block = True
+        with self.assertRaises(OperationalError):
+            self.wrapper.retry_busy(execute, 'SELECT 1', None, False, {})
+        self.assertEqual(execute.call_count, 1)
+        self.wrapper.in_atomic_block = False
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='NoName1')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    @staticmethod
+    @routers.replica_reads
+    def view(request):
+        return HttpResponse('{}|{}'.format(
+            router.db_for_read(Post), router.db_for_read(get_user_model())
+        ))
+
+    def test_reads_from_replica(self):
+        """Посты читаются из реплики, пользователи и сессии — нет."""
+        response = self.view(self.factory.get('/'))
+        self.assertEqual(response.content.decode(), 'replica|default')
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_replica_render_cached_when_synced(self):
+        """По реплике кешируется только то, что она уже видит."""
+        @routers.replica_reads
+        def replica_view(request):
+            return HttpResponse(feed_cache.get_fragment(
+                'page', 'index', [], lambda: request.GET['text']
+            ))
+
+        def render(text):
+            request = self.factory.get('/', {'text': text})
+            return replica_view(request).content.decode()
+
+        self.assertEqual(render('не скопирована'), 'не скопирована')
+        self.assertEqual(render('скопирована'), 'скопирована')
+        routers.mark_synced('replica', int(time.time() * 1000) + 1)
+        self.assertEqual(render('скопирована'), 'скопирована')
+        self.assertEqual(render('из кеша?'), 'скопирована')
+        time.sleep(0.002)
+        with run_on_commit():
+            feed_cache.bump('index')
+        self.assertEqual(render('без нового поста'), 'без нового поста')
+        self.assertEqual(
+            feed_cache.get_fragment(
+                'page', 'index', [], lambda: 'с новым постом'
+            ),
+            'с новым постом',
+        )
+
+    def test_stale_replica_response_without_etag(self):
+        """Ответ по отстающей реплике не кешируется и не получает ETag."""
+        @routers.replica_reads
+        @cache_anonymous(index_scopes)
+        def replica_view(request):
+            return HttpResponse('лента')
+
+        request = self.factory.get('/')
+        request.user = AnonymousUser()
+        self.assertFalse(replica_view(request).has_header('ETag'))
+        routers.mark_synced('replica', int(time.time() * 1000) + 1)
+        self.assertTrue(replica_view(request).has_header('ETag'))
+
+    def test_pinned_after_write(self):
+        """После записи ставится кука, и чтения идут в основную базу."""
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Коммент'},
+        )
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+        request = self.factory.get('/')
+        request.COOKIES[routers.PIN_COOKIE] = '1'
+        self.assertEqual(
+            self.view(request).content.decode().split('|')[0], 'default'
+        )
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Без реплик всё идёт в основную базу и кука не ставится."""
+        self.assertTrue(
+            self.view(self.factory.get('/')).content.startswith(b'default')
+        )
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Коммент'},
+        )
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
@@ -1,4 +1,15 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+from sorl.thumbnail.conf import settings as thumbnail_settings
+
+from . import metrics as request_metrics
+from .storage import ContentAddressedStorage
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
 
 
 def page_not_found(request, exception):
@@ -16,3 +27,31 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    allowed = (
+        request.user.is_staff
+        or request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+    )
+    if not allowed:
+        raise PermissionDenied
+    return HttpResponse(
+        request_metrics.render_prometheus(*request_metrics.buffer.snapshot()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+def media(request, path):
+    """Раздача MEDIA_ROOT при DEBUG; в продакшене то же правило в nginx.
+
+    Файлы с именем по хешу содержимого и миниатюры sorl (имя из хеша
+    исходника и параметров) не меняются, поэтому кешируются навсегда.
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if (ContentAddressedStorage.is_hashed(path)
+            or path.startswith(thumbnail_settings.THUMBNAIL_PREFIX)):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    return response
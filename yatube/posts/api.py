@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.http import JsonResponse
+
+from core.compression import compress_response
+from core.query_budget import query_budget
+
+from . import changes
+from .comments import CommentThread, serialize_thread
+from .models import Change, Group, Post
+from .paginators import CursorPaginator
+from .timeline import TimelinePaginator
+
+User = get_user_model()
+
+# Имя поля в ответе -> путь в .values().
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated_at': 'updated_at',
+    'image': 'image',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'comments_count': 'stats__comments_count',
+}
+
+
+def post_values(queryset):
+    return queryset.values(*POST_FIELDS.values())
+
+
+def serialize_post(row):
+    data = {name: row[lookup] for name, lookup in POST_FIELDS.items()}
+    if data['image']:
+        data['image'] = settings.MEDIA_URL + data['image']
+    data['comments_count'] = data['comments_count'] or 0
+    return data
+
+
+def link(request, cursor):
+    return f'{request.path}?cursor={cursor}' if cursor else None
+
+
+def page_response(request, paginator, **extra):
+    page = paginator.get_page(request.GET.get('cursor'))
+    return JsonResponse({
+        **extra,
+        'results': [serialize_post(row) for row in page],
+        'next': link(request, paginator.next_cursor),
+        'previous': link(request, paginator.previous_cursor),
+    })
+
+
+def error(status, detail):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+@compress_response
+@query_budget(3)
+def index(request):
+    return page_response(request, CursorPaginator(
+        post_values(Post.objects.all()), settings.POST_AMOUNT
+    ))
+
+
+@compress_response
+@query_budget(4)
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).values(
+        'id', 'title', 'slug', 'description'
+    ).first()
+    if group is None:
+        return error(404, 'Группа не найдена.')
+    return page_response(request, CursorPaginator(
+        post_values(Post.objects.filter(group_id=group['id'])),
+        settings.POST_AMOUNT,
+    ), group=group)
+
+
+@compress_response
+@query_budget(4)
+def profile(request, username):
+    author = User.objects.filter(username=username).values(
+        'id', 'username', 'first_name', 'last_name',
+        posts_count=F('stats__posts_count'),
+        followers_count=F('stats__followers_count'),
+        following_count=F('stats__following_count'),
+    ).first()
+    if author is None:
+        return error(404, 'Пользователь не найден.')
+    return page_response(request, CursorPaginator(
+        post_values(Post.objects.filter(author_id=author['id'])),
+        settings.POST_AMOUNT,
+    ), author=author)
+
+
+@compress_response
+@query_budget(5)
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return error(401, 'Нужна авторизация.')
+    return page_response(request, TimelinePaginator(
+        request.user, settings.POST_AMOUNT, post_values(Post.objects.all())
+    ))
+
+
+@compress_response
+@query_budget(5)
+def post_detail(request, post_id):
+    post = post_values(Post.objects.filter(pk=post_id)).first()
+    if post is None:
+        return error(404, 'Пост не найден.')
+    thread = CommentThread(post_id, request.GET.get('cursor'))
+    return JsonResponse({
+        'post': serialize_post(post),
+        **serialize_thread(thread),
+    })
+
+
+@compress_response
+@query_budget(1)
+def change_list(request):
+    """id изменённых и удалённых объектов после курсора since."""
+    model = request.GET.get('model')
+    if model is not None and model not in dict(Change.MODELS):
+        return error(400, 'Неизвестная модель.')
+    try:
+        after = int(request.GET.get('since', 0))
+    except ValueError:
+        return error(400, 'Курсор since должен быть числом.')
+    result = changes.since(after, model)
+    next_link = None
+    if result['more']:
+        next_link = f"{request.path}?since={result['cursor']}"
+        if model is not None:
+            next_link += f'&model={model}'
+    return JsonResponse({**result, 'next': next_link})
@@ -0,0 +1,66 @@
+"""Журнал изменений постов, комментариев и групп.
+
+Сигналы добавляют запись на каждое сохранение и удаление, массовые
+операции вызывают record_many сами. Кеши, поисковый индекс и выгрузки
+забирают изменения с курсора since() вместо полного пересчёта.
+"""
+from django.conf import settings
+
+from .models import Change, Comment, Group, Post
+
+MODELS = {
+    Post: Change.POST,
+    Comment: Change.COMMENT,
+    Group: Change.GROUP,
+}
+
+
+def record(instance, deleted=False):
+    Change.objects.create(
+        model=MODELS[type(instance)], object_id=instance.pk, deleted=deleted
+    )
+
+
+def record_many(model, ids, deleted=False):
+    Change.objects.bulk_create(
+        [
+            Change(model=MODELS[model], object_id=pk, deleted=deleted)
+            for pk in ids
+        ],
+        batch_size=settings.CHANGES_BATCH_SIZE,
+    )
+
+
+def cursor():
+    """Курсор последнего изменения: с него since() вернёт только новые."""
+    return Change.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 0
+
+
+def since(after=0, model=None, limit=None):
+    """Изменения после курсора after, не больше limit записей журнала.
+
+    Возвращает {'cursor': ..., 'more': ..., 'changed': {модель: [id]},
+    'deleted': {модель: [id]}}. Для каждого объекта важна последняя
+    запись: измененный, а затем удалённый пост попадёт только в deleted.
+    """
+    limit = limit or settings.CHANGES_PAGE_SIZE
+    rows = Change.objects.filter(pk__gt=after)
+    if model is not None:
+        rows = rows.filter(model=model)
+    rows = list(
+        rows.order_by('pk')
+        .values_list('pk', 'model', 'object_id', 'deleted')[:limit + 1]
+    )
+    more = len(rows) > limit
+    rows = rows[:limit]
+    latest = {}
+    for _, name, object_id, deleted in rows:
+        latest.pop((name, object_id), None)
+        latest[name, object_id] = deleted
+    changes = {'changed': {}, 'deleted': {}}
+    for (name, object_id), deleted in latest.items():
+        bucket = changes['deleted' if deleted else 'changed']
+        bucket.setdefault(name, []).append(object_id)
+    return {'cursor': rows[-1][0] if rows else after, 'more': more, **changes}
@@ -0,0 +1,211 @@
+from django.conf import settings
+
+from .models import Comment
+from .paginators import (BACKWARD, FORWARD, decode_cursor, encode_cursor,
+                         keyset_window)
+
+# Ширина сегмента пути: id в base36, хватает на 36**8 комментариев.
+SEGMENT_WIDTH = 8
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+# Больше любой цифры пути: prefix + PATH_END — верхняя граница ветки.
+PATH_END = chr(ord(DIGITS[-1]) + 1)
+
+
+def path_segment(pk):
+    digits = ''
+    while pk:
+        pk, rest = divmod(pk, 36)
+        digits = DIGITS[rest] + digits
+    return digits.rjust(SEGMENT_WIDTH, '0')
+
+
+def is_path(value):
+    return (
+        bool(value) and len(value) % SEGMENT_WIDTH == 0
+        and all(char in DIGITS for char in value)
+    )
+
+
+def reply_window(post, after, limit):
+    """Ответы ветки после пути after в порядке пути, не больше limit.
+
+    Ветка — корень after[:SEGMENT_WIDTH]; границы пути диапазоном, а не
+    LIKE, чтобы поиск шёл по индексу (post, path).
+    """
+    root = after[:SEGMENT_WIDTH]
+    return Comment.objects.filter(
+        post=post, path__gt=after, path__lt=root + PATH_END
+    ).order_by('path')[:limit]
+
+
+def depth(comment):
+    return len(comment.path) // SEGMENT_WIDTH - 1
+
+
+def reply_parent(parent):
+    """Родитель ответа: слишком глубокие ответы становятся соседями."""
+    while parent is not None and depth(parent) >= settings.COMMENT_MAX_DEPTH:
+        parent = parent.parent
+    return parent
+
+
+def assign_path(comment):
+    """Дописывает путь новому комментарию, когда известен его id."""
+    prefix = comment.parent.path if comment.parent_id else ''
+    comment.path = prefix + path_segment(comment.pk)
+    Comment.objects.filter(pk=comment.pk).update(path=comment.path)
+
+
+class CommentPage:
+    """Ленивая страница комментариев: запросы — при первом обращении.
+
+    Если фрагмент взят из кеша, запросов к базе нет. У последнего
+    показанного ответа ветки, в которой есть ещё ответы, more_replies —
+    путь, после которого продолжает ReplyPage.
+    """
+
+    def __init__(self, post, per_page):
+        self.post = post
+        self.per_page = per_page
+        self._comments = None
+        self._next_cursor = None
+
+    def _load_comments(self):
+        raise NotImplementedError
+
+    def _load(self):
+        if self._comments is None:
+            self._comments = self._load_comments()
+            for comment in self._comments:
+                comment.depth = depth(comment)
+
+    @staticmethod
+    def _trim(replies, limit):
+        if len(replies) > limit:
+            replies = replies[:limit]
+            replies[-1].more_replies = replies[-1].path
+        return replies
+
+    @property
+    def next_cursor(self):
+        self._load()
+        return self._next_cursor
+
+    def __iter__(self):
+        self._load()
+        return iter(self._comments)
+
+    def __len__(self):
+        self._load()
+        return len(self._comments)
+
+    def __getitem__(self, index):
+        self._load()
+        return self._comments[index]
+
+
+class CommentThread(CommentPage):
+    """Страница корневых комментариев поста вместе с ветками ответов.
+
+    Корни идут по (created, id) от старых к новым с курсорной
+    пагинацией, под каждым — до COMMENT_REPLIES_PER_PAGE ответов в
+    порядке пути; остальные догружает ReplyPage.
+    """
+
+    def __init__(self, post, cursor=None, per_page=None):
+        super().__init__(post, per_page or settings.COMMENTS_PER_PAGE)
+        self.cursor = cursor
+
+    def _roots(self):
+        decoded = decode_cursor(self.cursor) if self.cursor else None
+        key = decoded[1:] if decoded and decoded[0] == FORWARD else None
+        # Корни идут по возрастанию: это окно BACKWARD для keyset_window.
+        return list(keyset_window(
+            Comment.objects.filter(post=self.post, parent=None)
+            .select_related('author'),
+            BACKWARD, key, self.per_page + 1, fields=('created', 'pk'),
+        ))
+
+    def _replies(self, roots):
+        """{путь корня: ответы} одним запросом по окнам веток.
+
+        Окно каждой ветки — отдельный SELECT с LIMIT по индексу
+        (post, path); UNION ALL окон отдаёт только id.
+        """
+        limit = settings.COMMENT_REPLIES_PER_PAGE + 1
+        windows = [
+            reply_window(self.post, root.path, limit)
+            .values('pk').query.sql_with_params()
+            for root in roots if root.path
+        ]
+        if not windows:
+            return {}
+        sql = ' UNION ALL '.join(
+            f'SELECT * FROM ({window}) AS window_{number}'
+            for number, (window, _) in enumerate(windows)
+        )
+        params = [param for _, window in windows for param in window]
+        replies = {}
+        # Не pk__in=RawSQL: IN ((...)) SQLite читает как один скаляр.
+        for reply in (
+            Comment.objects.extra(
+                where=[f'{Comment._meta.db_table}.id IN ({sql})'],
+                params=params,
+            )
+            .select_related('author')
+            .order_by('path')
+        ):
+            replies.setdefault(reply.path[:SEGMENT_WIDTH], []).append(reply)
+        return replies
+
+    def _load_comments(self):
+        roots = self._roots()
+        if len(roots) > self.per_page:
+            roots = roots[:self.per_page]
+            self._next_cursor = encode_cursor(
+                FORWARD, roots[-1], date_field='created'
+            )
+        replies = self._replies(roots)
+        comments = []
+        for root in roots:
+            comments.append(root)
+            comments += self._trim(
+                replies.get(root.path, []),
+                settings.COMMENT_REPLIES_PER_PAGE,
+            )
+        return comments
+
+
+class ReplyPage(CommentPage):
+    """Следующие ответы одной ветки после пути after."""
+
+    def __init__(self, post, after, per_page=None):
+        super().__init__(post, per_page or settings.COMMENT_REPLIES_PER_PAGE)
+        self.after = after
+
+    def _load_comments(self):
+        return self._trim(
+            list(
+                reply_window(self.post, self.after, self.per_page + 1)
+                .select_related('author')
+            ),
+            self.per_page,
+        )
+
+
+def serialize_thread(thread):
+    return {
+        'comments': [
+            {
+                'id': comment.pk,
+                'parent': comment.parent_id,
+                'depth': comment.depth,
+                'author': comment.author.username,
+                'text': comment.text,
+                'created': comment.created,
+                'more_replies': getattr(comment, 'more_replies', None),
+            }
+            for comment in thread
+        ],
+        'next_cursor': thread.next_cursor,
+    }
@@ -0,0 +1,121 @@
+from django.db import transaction
+from django.db.models import (Case, Count, DateTimeField, F, Max, OuterRef,
+                              Subquery, Value, When)
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, GroupStats, Post, PostStats, UserStats
+
+
+def _counts(queryset, field, ids):
+    return dict(
+        queryset.filter(**{f'{field}__in': ids})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values_list(field, 'total')
+    )
+
+
+def rebuild_users(user_ids):
+    user_ids = list(user_ids)
+    posts = _counts(Post.objects, 'author_id', user_ids)
+    followers = _counts(Follow.objects, 'author_id', user_ids)
+    following = _counts(Follow.objects, 'user_id', user_ids)
+    with transaction.atomic():
+        UserStats.objects.filter(user_id__in=user_ids).delete()
+        UserStats.objects.bulk_create(
+            UserStats(
+                user_id=user_id,
+                posts_count=posts.get(user_id, 0),
+                followers_count=followers.get(user_id, 0),
+                following_count=following.get(user_id, 0),
+            )
+            for user_id in user_ids
+        )
+
+
+def rebuild_posts(post_ids):
+    post_ids = list(post_ids)
+    comments = _counts(Comment.objects, 'post_id', post_ids)
+    with transaction.atomic():
+        PostStats.objects.filter(post_id__in=post_ids).delete()
+        PostStats.objects.bulk_create(
+            PostStats(post_id=post_id, comments_count=comments.get(post_id, 0))
+            for post_id in post_ids
+        )
+
+
+def rebuild_groups(group_ids):
+    group_ids = list(group_ids)
+    totals = {
+        row['group_id']: row
+        for row in Post.objects.filter(group_id__in=group_ids)
+        .order_by()
+        .values('group_id')
+        .annotate(posts_count=Count('pk'), last_pub_date=Max('pub_date'))
+    }
+    with transaction.atomic():
+        GroupStats.objects.filter(group_id__in=group_ids).delete()
+        GroupStats.objects.bulk_create(
+            GroupStats(
+                group_id=group_id,
+                posts_count=totals.get(group_id, {}).get('posts_count', 0),
+                last_pub_date=totals.get(group_id, {}).get('last_pub_date'),
+            )
+            for group_id in group_ids
+        )
+
+
+def bump_user(user_id, field, delta):
+    """Атомарно сдвигает счётчик; недостающую строку пересчитывает.
+
+    При уменьшении строку не создаём: пользователь может удаляться
+    каскадом в той же транзакции.
+    """
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta}
+    )
+    if not updated and delta > 0:
+        rebuild_users([user_id])
+
+
+def bump_post(post_id, delta):
+    updated = PostStats.objects.filter(post_id=post_id).update(
+        comments_count=F('comments_count') + delta
+    )
+    if not updated and delta > 0:
+        rebuild_posts([post_id])
+
+
+def bump_group(group_id, delta, pub_date):
+    """Сдвигает счётчик постов группы и дату последнего из них.
+
+    Новый пост только двигает дату вперёд; если ушёл самый свежий пост,
+    дата берётся заново одним запросом по индексу группы.
+    """
+    stats = GroupStats.objects.filter(group_id=group_id)
+    if delta > 0:
+        pub_date = Value(pub_date, output_field=DateTimeField())
+        updated = stats.update(
+            posts_count=F('posts_count') + delta,
+            last_pub_date=Greatest(
+                Coalesce('last_pub_date', pub_date), pub_date
+            ),
+        )
+        if not updated:
+            rebuild_groups([group_id])
+        return
+    stats.update(
+        posts_count=F('posts_count') + delta,
+        last_pub_date=Case(
+            When(
+                last_pub_date__lte=pub_date,
+                then=Subquery(
+                    Post.objects.filter(group_id=OuterRef('group_id'))
+                    .order_by('-pub_date')
+                    .values('pub_date')[:1]
+                ),
+            ),
+            default=F('last_pub_date'),
+        ),
+    )
@@ -0,0 +1,226 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+
+from core import metrics, routers
+
+from .models import Group, Post
+
+User = get_user_model()
+
+VERSION_KEY = 'feed:version:{}'
+# Общее поколение кеша: входит в версию любой области.
+SITE_SCOPE = 'site'
+# Метаданные групп: меняются только при правке или удалении группы.
+GROUPS_SCOPE = 'groups'
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+stats = CacheStats()
+
+
+def scope_name(scope):
+    """Имя области инвалидации: 'index', группа, автор или пост."""
+    if isinstance(scope, Group):
+        return f'group:{scope.pk}'
+    if isinstance(scope, User):
+        return f'author:{scope.pk}'
+    if isinstance(scope, Post):
+        return f'post:{scope.pk}'
+    return str(scope)
+
+
+def _now():
+    return int(time.time() * 1000)
+
+
+def _raw_versions(scopes):
+    """Версии SITE_SCOPE и scopes одним get_many: [число]."""
+    keys = [
+        VERSION_KEY.format(scope_name(scope))
+        for scope in (SITE_SCOPE, *scopes)
+    ]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _now(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def fresh(*raw_versions):
+    """Видит ли база, из которой читает поток, изменения этих версий.
+
+    Версия области не меньше времени её последнего изменения в мс.
+    Реплика, скопированная позже, отдаёт то же, что основная база, и
+    отрендеренное по ней кешируется под общей версией; по отстающей
+    реплике страница только отдаётся.
+    """
+    synced = routers.synced_at()
+    return synced is None or max(raw_versions) <= synced
+
+
+def versioned(*scopes):
+    """(версия областей, можно ли кешировать прочитанное сейчас)."""
+    raw = _raw_versions(scopes)
+    return '-'.join(str(value) for value in raw), fresh(*raw)
+
+
+def version(*scopes):
+    return versioned(*scopes)[0]
+
+
+def bump(*scopes):
+    """Поднимает версии областей не ниже текущего времени в мс.
+
+    Версии пишутся после коммита: поднятая раньше версия дала бы
+    читателю закешировать под ней данные, которых он ещё не видит.
+    """
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def _bump(scopes):
+    now = _now()
+    keys = [VERSION_KEY.format(scope_name(scope)) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        current = found.get(key)
+        if current is None:
+            cache.set(key, now, None)
+            continue
+        try:
+            cache.incr(key, max(now - current, 1))
+        except ValueError:
+            cache.set(key, now, None)
+
+
+def timeout(forever=False):
+    """Срок кеша; forever — для фрагментов, которые меняются только
+    вместе с версией своей области: они хранятся без срока."""
+    return None if forever else settings.FEED_CACHE_TIMEOUT
+
+
+def get_fragment(fragment_name, scope, vary_on, render, forever=False):
+    key = make_template_fragment_key(fragment_name, vary_on)
+    fragment_version, cacheable = versioned(scope)
+    value = cache.get(key, version=fragment_version)
+    stats.record(value is not None)
+    metrics.record_cache(value is not None)
+    if value is None:
+        value = render()
+        if cacheable:
+            cache.set(
+                key, value, timeout(forever), version=fragment_version
+            )
+    return value
+
+
+def get_fragments(fragment_name, items, render):
+    """Фрагменты, ключ которых сам меняется с содержимым: [vary_on] -> [html].
+
+    Версии областей не читаются: vary_on включает, например, id и
+    updated_at поста, так что все фрагменты читаются одним get_many, а
+    отсутствующие render(номер) записываются одним set_many.
+    """
+    keys = [
+        make_template_fragment_key(fragment_name, vary_on)
+        for vary_on in items
+    ]
+    found = cache.get_many(keys)
+    missing = {}
+    values = []
+    for number, key in enumerate(keys):
+        value = found.get(key)
+        stats.record(value is not None)
+        metrics.record_cache(value is not None)
+        if value is None:
+            value = missing[key] = render(number)
+        values.append(value)
+    if missing:
+        cache.set_many(missing, timeout())
+    return values
+
+
+def invalidate_post(post, previous_group_id=None):
+    scopes = ['index', f'author:{post.author_id}', f'post:{post.pk}']
+    for group_id in {post.group_id, previous_group_id} - {None}:
+        scopes.append(f'group:{group_id}')
+    bump(*scopes)
+
+
+def invalidate_posts(posts):
+    """invalidate_post для постов, изменённых через update() без сигналов."""
+    scopes = {'index'}
+    for post in posts:
+        scopes.update((f'author:{post.author_id}', f'post:{post.pk}'))
+        if post.group_id is not None:
+            scopes.add(f'group:{post.group_id}')
+    bump(*scopes)
+
+
+def invalidate_group(group):
+    author_ids = (
+        Post.objects.filter(group=group)
+        .values_list('author_id', flat=True)
+        .distinct()
+    )
+    bump(
+        'index',
+        GROUPS_SCOPE,
+        f'group:{group.pk}',
+        *(f'author:{author_id}' for author_id in author_ids),
+    )
+
+
+def invalidate_author(user):
+    """Имя автора выводится в его постах на главной и в группах."""
+    group_ids = (
+        Post.objects.filter(author=user, group__isnull=False)
+        .values_list('group_id', flat=True)
+        .distinct()
+    )
+    bump(
+        'index',
+        f'author:{user.pk}',
+        *(f'group:{group_id}' for group_id in group_ids),
+    )
+
+
+def invalidate_comment(comment):
+    if comment.post_id is not None:
+        bump(f'post:{comment.post_id}')
+
+
+def invalidate_follow(follow):
+    bump(f'author:{follow.author_id}', f'author:{follow.user_id}')
+
+
+def invalidate_all():
+    bump(SITE_SCOPE)
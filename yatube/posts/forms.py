@@ -1,6 +1,7 @@
 from django import forms
 
 from .models import Comment, Post
+from .uploads import check_header
 
 
 class PostForm(forms.ModelForm):
@@ -8,6 +9,26 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('group', 'text', 'image')
 
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_errors = upload_errors or {}
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        # Заголовок уже разобран ImageField: пиксели ещё не декодированы.
+        header = getattr(image, 'image', None)
+        if header is not None:
+            message = check_header(header.format, header.size)
+            if message:
+                raise forms.ValidationError(message)
+        return image
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field, message in self.upload_errors.items():
+            self.add_error(field, message)
+        return cleaned_data
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
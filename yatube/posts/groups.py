@@ -0,0 +1,79 @@
+import threading
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+from . import feed_cache
+from .models import Group
+from .paginators import CursorPaginator
+
+
+class GroupCache:
+    """slug -> Group в памяти процесса.
+
+    Перед чтением сверяет версию области GROUPS_SCOPE в общем кеше: её
+    поднимает любой процесс, изменивший группу, и тогда словарь
+    сбрасывается целиком. Несуществующие slug не запоминаются, чтобы
+    перебор адресов не раздувал словарь.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._groups = {}
+
+    def get(self, slug):
+        current = feed_cache.version(feed_cache.GROUPS_SCOPE)
+        with self._lock:
+            if current != self._version:
+                self._groups, self._version = {}, current
+            group = self._groups.get(slug)
+        if group is None:
+            # Из основной базы: устаревшая группа из реплики осталась бы
+            # в словаре до следующей правки.
+            group = Group.objects.using(DEFAULT_DB_ALIAS).filter(
+                slug=slug
+            ).first()
+            if group is not None:
+                with self._lock:
+                    if self._version == current:
+                        self._groups[slug] = group
+        return group
+
+
+group_cache = GroupCache()
+
+
+def directory():
+    """Группы с числом постов и датой последнего из счётчиков GroupStats.
+
+    Счётчики ведут сигналы постов, поэтому пересборка после изменения
+    области 'index' — один SELECT по группам без агрегатов.
+    """
+    return feed_cache.get_fragment(
+        'group_directory', 'index', [],
+        lambda: list(
+            Group.objects.order_by('title').values(
+                'slug', 'title', 'description',
+                posts_count=Coalesce('stats__posts_count', 0),
+                latest_pub_date=F('stats__last_pub_date'),
+            )
+        ),
+    )
+
+
+class GroupPaginator(CursorPaginator):
+    """Курсорная пагинация группы с первой страницей из общего кеша."""
+
+    def __init__(self, group, per_page):
+        super().__init__(group.posts.select_related('author'), per_page)
+        self.group = group
+
+    def fetch(self, direction, key, limit):
+        if key is not None:
+            return super().fetch(direction, key, limit)
+        return feed_cache.get_fragment(
+            'group_first_page', self.group, [limit],
+            lambda: super(GroupPaginator, self).fetch(direction, key, limit),
+        )
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт варианты картинок всех ширин и форматов '
+        'для уже загруженных постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.THUMBNAIL_WORKERS
+        )
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = (
+            Post.objects.exclude(image='').exclude(image=None)
+            .order_by('pk')
+            .only('pk', 'image', 'author_id', 'group_id')
+        )
+        done = failed = 0
+        batch = []
+        for post in posts.iterator(chunk_size=batch_size):
+            batch.append(post)
+            if len(batch) == batch_size:
+                ok = self.process(batch, options['workers'])
+                done, failed = done + ok, failed + len(batch) - ok
+                batch = []
+        if batch:
+            ok = self.process(batch, options['workers'])
+            done, failed = done + ok, failed + len(batch) - ok
+        self.stdout.write(f'Готово: {done}, с ошибками: {failed}')
+
+    def process(self, posts, workers):
+        results = thumbnails.generate_many(
+            [post.image.name for post in posts], workers
+        )
+        thumbnails.touch(
+            post.pk for post, ok in zip(posts, results) if ok
+        )
+        self.stdout.write(f'Обработано постов: {len(posts)}')
+        return sum(results)
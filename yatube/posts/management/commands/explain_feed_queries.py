@@ -0,0 +1,126 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts.models import Comment, Follow, Group, Post
+from posts.query_plans import explain, feed_queries
+
+User = get_user_model()
+
+# Индексы лент из миграции 0025_feed_indexes: (модель, имя индекса).
+FEED_INDEXES = (
+    (Comment, 'comment_post_created_idx'),
+    (Post, 'post_author_pub_date_idx'),
+    (Post, 'post_group_pub_date_idx'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает планы и время запросов лент без составных индексов '
+        'и с ними на сгенерированных данных во временной базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        # База создаётся по текущей схеме и заполняется текущими моделями;
+        # снимаются и возвращаются только сравниваемые индексы.
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            objects = self.populate(options)
+            self.toggle_indexes('remove_index')
+            self.report('До индексов', objects, options['repeat'])
+            self.toggle_indexes('add_index')
+            self.report('После индексов', objects, options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def toggle_indexes(self, operation):
+        with connection.schema_editor() as editor:
+            for model, name in FEED_INDEXES:
+                index = next(
+                    index for index in model._meta.indexes
+                    if index.name == name
+                )
+                getattr(editor, operation)(model, index)
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def populate(self, options):
+        rnd = random.Random(options['seed'])
+        User.objects.bulk_create(
+            User(username=f'user{number}')
+            for number in range(options['users'])
+        )
+        Group.objects.bulk_create(
+            Group(title=f'Группа {number}', slug=f'group{number}')
+            for number in range(options['groups'])
+        )
+        users = list(User.objects.order_by('pk'))
+        groups = list(Group.objects.order_by('pk'))
+        Post.objects.bulk_create(
+            (
+                Post(
+                    text=f'Пост {number}',
+                    author=rnd.choice(users),
+                    group=rnd.choice(groups + [None]),
+                )
+                for number in range(options['posts'])
+            ),
+            batch_size=500,
+        )
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        Comment.objects.bulk_create(
+            (
+                Comment(
+                    text=f'Комментарий {number}',
+                    author=rnd.choice(users),
+                    post_id=rnd.choice(post_ids),
+                )
+                for number in range(options['comments'])
+            ),
+            batch_size=500,
+        )
+        Follow.objects.bulk_create(
+            (
+                Follow(user=user, author=author)
+                for user in users
+                for author in rnd.sample(
+                    users, min(options['follows'], len(users))
+                )
+                if author != user
+            ),
+            batch_size=500,
+        )
+        reader = users[0]
+        return {
+            'user': reader,
+            'author': reader.follower.first().author,
+            'group': groups[0],
+            'post': Post.objects.get(pk=post_ids[-1]),
+        }
+
+    def report(self, title, objects, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in feed_queries(**objects).items():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            elapsed = (time.perf_counter() - started) / repeat * 1000
+            self.stdout.write(f'{name}: {elapsed:.2f} мс')
+            for line in explain(queryset):
+                self.stdout.write(f'    {line}')
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает группы, посты, комментарии и подписки в NDJSON или CSV '
+        'потоком, не держа всю базу в памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл дампа, «-» — stdout.')
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS, default='ndjson'
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--images', action='store_true',
+            help='Вложить картинки постов в дамп (base64).',
+        )
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            self.export(self.stdout, options)
+            return
+        with open(options['path'], 'w', encoding='utf-8', newline='') as dump:
+            self.export(dump, options)
+
+    def export(self, stream, options):
+        batch_size = options['batch_size']
+        writer = transfer.writer(options['format'], stream)
+        counts = {}
+        for record in transfer.export_records(batch_size, options['images']):
+            writer.write(record)
+            name = record['model']
+            counts[name] = counts.get(name, 0) + 1
+            if counts[name] % batch_size == 0:
+                self.stderr.write(f'{name}: {counts[name]}')
+        self.stderr.write('Выгружено: ' + ', '.join(
+            f'{name} {count}' for name, count in counts.items()
+        ))
@@ -0,0 +1,56 @@
+import sys
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from posts import feed_cache, search, transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает дамп export_posts пачками через bulk_create и '
+        'перестраивает счётчики, поисковый индекс и кеш лент.'
+    )
+    stealth_options = ('stdin',)
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл дампа, «-» — stdin.')
+        parser.add_argument(
+            '--format', choices=transfer.FORMATS, default='ndjson'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--images', action='store_true',
+            help='Сохранить вложенные в дамп картинки в хранилище.',
+        )
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            counts = self.load(options.get('stdin', sys.stdin), options)
+        else:
+            with open(options['path'], encoding='utf-8', newline='') as dump:
+                counts = self.load(dump, options)
+        call_command(
+            'rebuild_counters', batch_size=options['batch_size'],
+            stdout=self.stdout,
+        )
+        if search.is_available():
+            search.rebuild()
+        feed_cache.invalidate_all()
+        self.stdout.write('Загружено: ' + ', '.join(
+            f'{name} {count}' for name, count in counts.items()
+        ))
+        if options['images'] and counts['post']:
+            self.stdout.write(
+                'Варианты картинок: manage.py backfill_image_variants'
+            )
+
+    def load(self, stream, options):
+        importer = transfer.Importer(options['batch_size'], options['images'])
+        return importer.load(
+            transfer.read_records(options['format'], stream),
+            progress=self.progress,
+        )
+
+    def progress(self, name, count):
+        self.stderr.write(f'{name}: {count}')
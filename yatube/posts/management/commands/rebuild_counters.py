@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts.counters import rebuild_groups, rebuild_posts, rebuild_users
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+def chunked_ids(queryset, batch_size):
+    ids = queryset.order_by('pk').values_list('pk', flat=True)
+    batch = []
+    for pk in ids.iterator(chunk_size=batch_size):
+        batch.append(pk)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики постов, подписок, комментариев и групп.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        users = posts = groups = 0
+        for batch in chunked_ids(User.objects.all(), batch_size):
+            rebuild_users(batch)
+            users += len(batch)
+        for batch in chunked_ids(Post.objects.all(), batch_size):
+            rebuild_posts(batch)
+            posts += len(batch)
+        for batch in chunked_ids(Group.objects.all(), batch_size):
+            rebuild_groups(batch)
+            groups += len(batch)
+        self.stdout.write(
+            f'Пересчитано пользователей: {users}, постов: {posts}, '
+            f'групп: {groups}'
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов без ссылок, отложенные release из-за '
+        'недавней записи.'
+    )
+
+    def handle(self, *args, **options):
+        released = thumbnails.release_unreferenced()
+        self.stdout.write(f'Удалено картинок: {released}')
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+CREATE_SQL = (
+    "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+    "text, tokenize='unicode61 remove_diacritics 2')"
+)
+FILL_SQL = 'INSERT INTO posts_post_fts (rowid, text) SELECT id, text FROM posts_post'
+DROP_SQL = 'DROP TABLE posts_post_fts'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_SQL)
+    schema_editor.execute(FILL_SQL)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_thumbnailtask'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
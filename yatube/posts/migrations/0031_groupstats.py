@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    totals = {
+        row['group_id']: row
+        for row in Post.objects.exclude(group=None)
+        .order_by()
+        .values('group_id')
+        .annotate(
+            posts_count=models.Count('pk'),
+            last_pub_date=models.Max('pub_date'),
+        )
+    }
+    GroupStats.objects.bulk_create(
+        (
+            GroupStats(
+                group_id=group_id,
+                posts_count=totals.get(group_id, {}).get('posts_count', 0),
+                last_pub_date=totals.get(group_id, {}).get('last_pub_date'),
+            )
+            for group_id in Group.objects.values_list('pk', flat=True)
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0030_popular_author'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='группа')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='постов')),
+                ('last_pub_date', models.DateTimeField(blank=True, null=True, verbose_name='дата последнего поста')),
+            ],
+            options={
+                'verbose_name': 'Счётчики группы',
+                'verbose_name_plural': 'Счётчики групп',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
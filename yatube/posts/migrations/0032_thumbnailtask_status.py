@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0031_groupstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thumbnailtask',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='взята в работу'),
+        ),
+        migrations.AddField(
+            model_name='thumbnailtask',
+            name='status',
+            field=models.CharField(choices=[('pending', 'в очереди'), ('processing', 'в работе')], default='pending', max_length=16, verbose_name='статус'),
+        ),
+        migrations.AddIndex(
+            model_name='thumbnailtask',
+            index=models.Index(fields=['status', 'id'], name='thumbnailtask_status_idx'),
+        ),
+    ]
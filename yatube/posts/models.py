@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from core.storage import ContentAddressedStorage
+
 User = get_user_model()
 
 
@@ -8,6 +10,9 @@ class Group(models.Model):
     title = models.CharField('заголовок', max_length=200)
     slug = models.SlugField('слаг', unique=True)
     description = models.TextField('описание')
+    updated_at = models.DateTimeField(
+        'дата изменения', auto_now=True, db_index=True
+    )
 
     class Meta:
         verbose_name = 'Группа'
@@ -41,14 +46,29 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True,
         null=True,
+        db_index=True,
+    )
+    updated_at = models.DateTimeField(
+        'дата изменения', auto_now=True, db_index=True
     )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = (
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx',
+            ),
+        )
 
     def __str__(self) -> str:
         return self.text[:15]
@@ -70,15 +90,77 @@ class Comment(models.Model):
     )
     text = models.TextField('текст комментария')
     created = models.DateTimeField('дата публикации', auto_now_add=True)
+    updated_at = models.DateTimeField(
+        'дата изменения', auto_now=True, db_index=True
+    )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='replies',
+        verbose_name='ответ на',
+    )
+    path = models.CharField(
+        'путь в ветке',
+        max_length=255,
+        blank=True,
+        editable=False,
+        help_text='Сегменты id предков и самого комментария',
+    )
 
     class Meta:
+        ordering = ('created',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created'),
+                name='comment_post_created_idx',
+            ),
+            models.Index(
+                fields=('post', 'path'),
+                name='comment_post_path_idx',
+            ),
+        )
 
     def _str_(self) -> str:
         return self.text[:15]
 
 
+class Change(models.Model):
+    """Запись журнала изменений контента; строки только добавляются.
+
+    id записи — курсор для синхронизации: в отличие от updated_at он
+    растёт строго и не зависит от часов.
+    """
+
+    POST = 'post'
+    COMMENT = 'comment'
+    GROUP = 'group'
+    MODELS = (
+        (POST, 'пост'),
+        (COMMENT, 'комментарий'),
+        (GROUP, 'группа'),
+    )
+
+    model = models.CharField('модель', max_length=16, choices=MODELS)
+    object_id = models.PositiveIntegerField('id объекта')
+    deleted = models.BooleanField('удалён', default=False)
+    changed_at = models.DateTimeField('время изменения', auto_now_add=True)
+
+    class Meta:
+        ordering = ('pk',)
+        verbose_name = 'Изменение'
+        verbose_name_plural = 'Журнал изменений'
+        indexes = (
+            models.Index(
+                fields=('model', 'id'),
+                name='change_model_id_idx',
+            ),
+        )
+
+
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
@@ -94,3 +176,158 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписчик'
         verbose_name_plural = 'Подписчики'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+        )
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='автор',
+    )
+    pub_date = models.DateTimeField('дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date', '-post')
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_pub_date_idx',
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='timeline_user_author_idx',
+            ),
+        ]
+
+
+class PopularAuthor(models.Model):
+    """Автор, чьи посты подмешиваются в ленты при чтении.
+
+    Строка появляется, когда подписчиков становится больше
+    TIMELINE_FANOUT_LIMIT, и удаляется воркером process_timelines после
+    раскладки постов, когда их снова не больше порога за вычетом
+    TIMELINE_FANOUT_HYSTERESIS.
+    """
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+        verbose_name='автор',
+    )
+    settling = models.BooleanField('ждёт раскладки', default=False)
+
+    class Meta:
+        verbose_name = 'Популярный автор'
+        verbose_name_plural = 'Популярные авторы'
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='пользователь',
+    )
+    posts_count = models.PositiveIntegerField('постов', default=0)
+    followers_count = models.PositiveIntegerField('подписчиков', default=0)
+    following_count = models.PositiveIntegerField('подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class PostStats(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='пост',
+    )
+    comments_count = models.PositiveIntegerField('комментариев', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики поста'
+        verbose_name_plural = 'Счётчики постов'
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='группа',
+    )
+    posts_count = models.PositiveIntegerField('постов', default=0)
+    last_pub_date = models.DateTimeField(
+        'дата последнего поста', null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики группы'
+        verbose_name_plural = 'Счётчики групп'
+
+
+class ThumbnailTask(models.Model):
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    STATUSES = (
+        (PENDING, 'в очереди'),
+        (PROCESSING, 'в работе'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='thumbnail_tasks',
+        verbose_name='пост',
+    )
+    image = models.CharField('картинка', max_length=100)
+    created = models.DateTimeField('дата постановки', auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField('попыток', default=0)
+    status = models.CharField(
+        'статус', max_length=16, choices=STATUSES, default=PENDING
+    )
+    claimed_at = models.DateTimeField('взята в работу', null=True, blank=True)
+
+    class Meta:
+        ordering = ('pk',)
+        verbose_name = 'Задача миниатюры'
+        verbose_name_plural = 'Задачи миниатюр'
+        indexes = (
+            models.Index(
+                fields=('status', 'id'),
+                name='thumbnailtask_status_idx',
+            ),
+        )
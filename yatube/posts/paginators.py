@@ -0,0 +1,154 @@
+import binascii
+
+from django.core.paginator import (
+    InvalidPage, Page, PageNotAnInteger, Paginator,
+)
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+def field_value(obj, name):
+    """Поле объекта модели или строки .values(), где pk лежит в 'id'."""
+    if isinstance(obj, dict):
+        return obj['id' if name == 'pk' else name]
+    return getattr(obj, name)
+
+
+def encode_cursor(direction, obj, date_field='pub_date'):
+    date = field_value(obj, date_field).isoformat()
+    raw = f'{direction}|{date}|{field_value(obj, "pk")}'
+    return urlsafe_base64_encode(force_bytes(raw))
+
+
+def decode_cursor(token):
+    """Возвращает (направление, pub_date, pk) или None для битого токена."""
+    try:
+        direction, pub_date, pk = force_str(
+            urlsafe_base64_decode(token)
+        ).split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        return None
+    if direction not in (FORWARD, BACKWARD) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+def keyset_window(queryset, direction, key, limit,
+                  fields=('pub_date', 'pk')):
+    """Срез queryset после ключа key=(pub_date, pk) в порядке обхода.
+
+    FORWARD идёт к более старым записям, BACKWARD — к более новым.
+    """
+    date_field, pk_field = fields
+    if direction == FORWARD:
+        lookup, sign = 'lt', '-'
+    else:
+        lookup, sign = 'gt', ''
+    if key is not None:
+        pub_date, pk = key
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__{lookup}': pub_date})
+            | Q(**{date_field: pub_date, f'{pk_field}__{lookup}': pk})
+        )
+    return queryset.order_by(sign + date_field, sign + pk_field)[:limit]
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация по (pub_date, id): без COUNT(*) и OFFSET.
+
+    Страница остаётся обычным Page с относительным номером: 2, если
+    есть предыдущая, иначе 1; num_pages на единицу больше номера,
+    если есть следующая. Ссылки строятся по next_cursor/previous_cursor.
+    """
+    is_keyset = True
+
+    def __init__(self, object_list, per_page):
+        super().__init__(object_list, per_page)
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    @property
+    def num_pages(self):
+        return 1 + bool(self.previous_cursor) + bool(self.next_cursor)
+
+    def fetch(self, direction, key, limit):
+        return list(keyset_window(self.object_list, direction, key, limit))
+
+    def get_page(self, cursor):
+        decoded = decode_cursor(cursor) if cursor else None
+        if decoded is None:
+            direction, key = FORWARD, None
+        else:
+            direction, key = decoded[0], decoded[1:]
+        objects = self.fetch(direction, key, self.per_page + 1)
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if direction == FORWARD:
+            has_previous, has_next = key is not None, has_more
+        else:
+            objects.reverse()
+            has_previous, has_next = has_more, True
+        if objects and has_previous:
+            self.previous_cursor = encode_cursor(BACKWARD, objects[0])
+        if objects and has_next:
+            self.next_cursor = encode_cursor(FORWARD, objects[-1])
+        return Page(objects, 1 + bool(self.previous_cursor), self)
+
+
+class NextPagePaginator(Paginator):
+    """Нумерованные страницы без COUNT(*): известно лишь, есть ли следующая.
+
+    Для выдачи без ключа для keyset, например поиска по рангу. Страница
+    читается срезом на одну запись длиннее; num_pages — номер текущей
+    страницы плюс один, если есть следующая. Номер ограничен max_pages,
+    чтобы OFFSET не рос без предела, а page_range — соседними номерами.
+    """
+    is_open_ended = True
+    page_links = 5
+
+    def __init__(self, object_list, per_page, max_pages):
+        super().__init__(object_list, per_page)
+        self.max_pages = max_pages
+        self.number = 1
+        self.has_next = False
+
+    @property
+    def num_pages(self):
+        return self.number + self.has_next
+
+    @property
+    def page_range(self):
+        return range(
+            max(self.number - self.page_links, 1), self.num_pages + 1
+        )
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы — не целое число.')
+        if number < 1 or number > self.max_pages:
+            raise InvalidPage('Нет такой страницы.')
+        return number
+
+    def get_page(self, number):
+        try:
+            number = self.validate_number(number)
+        except InvalidPage:
+            number = 1
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not objects and number > 1:
+            return self.get_page(1)
+        self.number = number
+        self.has_next = (
+            len(objects) > self.per_page and number < self.max_pages
+        )
+        return Page(objects[:self.per_page], number, self)
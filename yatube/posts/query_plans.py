@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db import connection
+
+from .comments import path_segment, reply_window
+from .models import Comment, Follow, Post
+from .paginators import BACKWARD, FORWARD, keyset_window
+
+
+def explain(queryset):
+    """План выполнения queryset: по строке на шаг плана."""
+    sql, params = queryset.query.sql_with_params()
+    if connection.vendor == 'sqlite':
+        sql = 'EXPLAIN QUERY PLAN ' + sql
+    else:
+        sql = 'EXPLAIN ' + sql
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [str(row[-1]) for row in cursor.fetchall()]
+
+
+def feed_queries(user, author, group, post):
+    """Запросы лент в том виде, в каком их выполняют view."""
+    limit = settings.POST_AMOUNT + 1
+    return {
+        'index': keyset_window(Post.objects.all(), FORWARD, None, limit),
+        'group_list': keyset_window(
+            Post.objects.filter(group=group), FORWARD, None, limit
+        ),
+        'profile': keyset_window(
+            Post.objects.filter(author=author), FORWARD, None, limit
+        ),
+        'follow_index': Post.objects.filter(
+            author__following__user=user
+        )[:limit],
+        'following': Follow.objects.filter(user=user, author=author)[:1],
+        'post_comments': keyset_window(
+            Comment.objects.filter(post=post, parent=None),
+            BACKWARD, None, settings.COMMENTS_PER_PAGE + 1,
+            fields=('created', 'pk'),
+        ),
+        'comment_replies': reply_window(
+            post, path_segment(1), settings.COMMENT_REPLIES_PER_PAGE + 1
+        ),
+    }
@@ -0,0 +1,103 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from . import feed_cache
+from .groups import group_cache
+from .models import Post
+
+User = get_user_model()
+
+RESPONSE_KEY = 'response:{}'
+
+
+def cache_anonymous(scopes):
+    """Кеширует ответ view целиком для анонимных GET-запросов.
+
+    scopes(**kwargs) возвращает области feed_cache, от которых зависит
+    страница, или None, если кешировать нечего (например, 404). Ключ —
+    полный путь с параметрами, версия — версии областей; из них же
+    считается ETag, так что If-None-Match отвечается 304 без чтения
+    кеша и рендеринга. ETag получает только закешированный ответ:
+    страница по отстающей реплике отдаётся без него.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view_func(request, *args, **kwargs)
+            view_scopes = scopes(**kwargs)
+            if view_scopes is None:
+                return view_func(request, *args, **kwargs)
+            path = request.get_full_path()
+            scopes_version, cacheable = feed_cache.versioned(*view_scopes)
+            etag = quote_etag(
+                hashlib.md5(f'{path}|{scopes_version}'.encode()).hexdigest()
+            )
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return not_modified
+            key = RESPONSE_KEY.format(hashlib.md5(path.encode()).hexdigest())
+            cached = cache.get(key, version=scopes_version)
+            if cached is None:
+                response = view_func(request, *args, **kwargs)
+                if (response.status_code != 200 or response.streaming
+                        or not cacheable):
+                    return response
+                cached = (
+                    response.content, response['Content-Type'],
+                    int(time.time()),
+                )
+                cache.set(
+                    key, cached, feed_cache.timeout(), version=scopes_version
+                )
+            else:
+                response = HttpResponse(cached[0], content_type=cached[1])
+            last_modified = cached[2]
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, max_age=0, must_revalidate=True)
+            patch_vary_headers(response, ('Cookie',))
+            return get_conditional_response(
+                request, etag=etag, last_modified=last_modified,
+                response=response,
+            )
+        return wrapper
+    return decorator
+
+
+def index_scopes():
+    return ('index',)
+
+
+def directory_scopes():
+    return ('index',)
+
+
+def group_scopes(slug):
+    group = group_cache.get(slug)
+    return None if group is None else (f'group:{group.pk}',)
+
+
+def profile_scopes(username):
+    user_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    return None if user_id is None else (f'author:{user_id}',)
+
+
+def post_scopes(post_id):
+    author_id = Post.objects.filter(pk=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    if author_id is None:
+        return None
+    return f'post:{post_id}', f'author:{author_id}'
@@ -0,0 +1,125 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+TABLE = 'posts_post_fts'
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_TOKENS = 30
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_query(text):
+    """Запрос FTS5 из слов пользователя: все слова, поиск по префиксу."""
+    return ' '.join(f'"{term}"*' for term in re.findall(r'\w+', text))
+
+
+def index_post(post):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text],
+        )
+
+
+def remove_post(post_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text) '
+            'SELECT id, text FROM posts_post'
+        )
+
+
+def matching_ids(text, limit=None):
+    query = build_query(text)
+    if not query:
+        return []
+    sql = f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s ORDER BY rank'
+    params = [query]
+    if limit is not None:
+        sql += ' LIMIT %s'
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+class SearchResults:
+    """Ленивая выдача FTS5 для Paginator, отсортированная по bm25.
+
+    Посты получают атрибут search_snippet с подсвеченными совпадениями.
+    """
+
+    def __init__(self, text, queryset):
+        self.query = build_query(text)
+        self.queryset = queryset
+
+    def count(self):
+        if not self.query:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {TABLE} WHERE {TABLE} MATCH %s',
+                [self.query],
+            )
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('SearchResults поддерживает только срезы.')
+        if not self.query:
+            return []
+        start = index.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, snippet({TABLE}, 0, %s, %s, %s, %s) '
+                f'FROM {TABLE} WHERE {TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                [
+                    MARK_START, MARK_END, '…', SNIPPET_TOKENS,
+                    self.query, index.stop - start, start,
+                ],
+            )
+            rows = cursor.fetchall()
+        posts = self.queryset.in_bulk([post_id for post_id, _ in rows])
+        results = []
+        for post_id, snippet in rows:
+            post = posts.get(post_id)
+            if post is not None:
+                post.search_snippet = highlight(snippet)
+                results.append(post)
+        return results
+
+
+def search(text, queryset=None):
+    if queryset is None:
+        queryset = Post.objects.select_related('author', 'group')
+    if is_available():
+        return SearchResults(text, queryset)
+    if not text.strip():
+        return queryset.none()
+    return queryset.filter(text__icontains=text)
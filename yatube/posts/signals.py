@@ -0,0 +1,219 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import (changes, comments, counters, feed_cache, search, sitemaps,
+               thumbnails, timeline)
+from .models import (Comment, Follow, Group, GroupStats, Post, PostStats,
+                     UserStats)
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.bulk_create(
+            [UserStats(user=instance)], ignore_conflicts=True
+        )
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.bulk_create(
+            [GroupStats(group=instance)], ignore_conflicts=True
+        )
+
+
+@receiver(post_save, sender=Post)
+def count_post_created(sender, instance, created, **kwargs):
+    if created:
+        PostStats.objects.bulk_create(
+            [PostStats(post=instance)], ignore_conflicts=True
+        )
+        counters.bump_user(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_save, sender=Post)
+def count_group_posts(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_group_id', None)
+    if previous == instance.group_id:
+        return
+    if previous is not None:
+        counters.bump_group(previous, -1, instance.pub_date)
+    if instance.group_id is not None:
+        counters.bump_group(instance.group_id, 1, instance.pub_date)
+
+
+@receiver(post_delete, sender=Post)
+def count_post_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, 'posts_count', -1)
+    if instance.group_id is not None:
+        counters.bump_group(instance.group_id, -1, instance.pub_date)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow_created(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.author_id, 'followers_count', 1)
+        counters.bump_user(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_follow_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, 'followers_count', -1)
+    counters.bump_user(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_created(sender, instance, created, **kwargs):
+    if created and instance.post_id is not None:
+        counters.bump_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_deleted(sender, instance, **kwargs):
+    if instance.post_id is not None:
+        counters.bump_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def assign_comment_path(sender, instance, created, **kwargs):
+    if created:
+        comments.assign_path(instance)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def settle_author_timelines(sender, instance, **kwargs):
+    timeline.request_settle(instance.author_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_state(sender, instance, **kwargs):
+    instance._previous_group_id = instance._previous_image = None
+    if instance.pk is not None:
+        instance._previous_group_id, instance._previous_image = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', 'image')
+            .first()
+        ) or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_image', None)
+    if previous and previous != instance.image.name:
+        thumbnails.release_later(previous)
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    thumbnails.release_later(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    feed_cache.invalidate_post(
+        instance, getattr(instance, '_previous_group_id', None)
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_sitemaps(sender, instance, **kwargs):
+    sitemaps.invalidate_post(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    feed_cache.invalidate_group(instance)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_feeds(sender, instance, **kwargs):
+    feed_cache.invalidate_comment(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_feeds(sender, instance, **kwargs):
+    feed_cache.invalidate_follow(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_feeds(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        feed_cache.invalidate_author(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_profile_sitemap(sender, instance, update_fields=None,
+                               **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        sitemaps.invalidate_profile(instance)
+
+
+@receiver(post_migrate)
+def invalidate_all_feeds(sender, **kwargs):
+    # Схема или данные сброшены (migrate, flush): кешу больше нельзя верить.
+    if sender.name == 'posts':
+        feed_cache.invalidate_all()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Group)
+def record_change(sender, instance, **kwargs):
+    changes.record(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Group)
+def record_deletion(sender, instance, **kwargs):
+    changes.record(instance, deleted=True)
+
+
+@receiver(pre_delete, sender=Group)
+def record_ungrouped_posts(sender, instance, **kwargs):
+    # SET_NULL обнуляет группу у постов запросом UPDATE, без сигналов.
+    posts = list(
+        Post.objects.filter(group=instance).only('pk', 'author_id', 'group_id')
+    )
+    Post.objects.filter(group=instance).update(updated_at=timezone.now())
+    changes.record_many(Post, [post.pk for post in posts])
+    feed_cache.invalidate_posts(posts)
+    sitemaps.invalidate_posts(posts)
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_text(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
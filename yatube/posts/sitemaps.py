@@ -0,0 +1,163 @@
+"""Карта сайта: индекс и куски разделов по диапазонам id.
+
+Кусок n раздела берёт строки с id от n * SITEMAP_CHUNK_SIZE до следующей
+границы: ни COUNT, ни OFFSET, и новые посты не сдвигают старые куски.
+Кусок, за границей которого id уже выданы, закончен — он хранится в
+кеше без срока и пересобирается, только когда сигнал поднимает версию
+его области.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Max
+from django.http import Http404, HttpResponse
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from core.query_budget import query_budget
+
+from . import feed_cache
+from .models import Group, Post
+
+User = get_user_model()
+
+
+def chunk_of(pk):
+    return pk // settings.SITEMAP_CHUNK_SIZE
+
+
+def id_range(chunk):
+    start = chunk * settings.SITEMAP_CHUNK_SIZE
+    return start, start + settings.SITEMAP_CHUNK_SIZE
+
+
+def post_urls(chunk):
+    start, stop = id_range(chunk)
+    return [
+        (reverse('posts:post_detail', args=[pk]), updated_at)
+        for pk, updated_at in Post.objects.filter(
+            pk__gte=start, pk__lt=stop
+        ).order_by('pk').values_list('pk', 'updated_at')
+    ]
+
+
+def profile_urls(chunk):
+    start, stop = id_range(chunk)
+    return [
+        (reverse('posts:profile', args=[username]), lastmod)
+        for username, lastmod in User.objects.filter(
+            pk__gte=start, pk__lt=stop
+        ).annotate(
+            lastmod=Max('posts__updated_at')
+        ).filter(
+            lastmod__isnull=False
+        ).order_by('pk').values_list('username', 'lastmod')
+    ]
+
+
+def group_urls(chunk):
+    return [
+        (
+            reverse('posts:group_list', args=[slug]),
+            max(filter(None, (updated_at, lastmod))),
+        )
+        for slug, updated_at, lastmod in Group.objects.annotate(
+            lastmod=Max('posts__updated_at')
+        ).order_by('pk').values_list('slug', 'updated_at', 'lastmod')
+    ]
+
+
+# Раздел -> (адреса куска, ключ последнего id в last_ids()). Групп мало,
+# они умещаются в один кусок и пересобираются по области 'index'.
+SECTIONS = {
+    'posts': (post_urls, 'posts'),
+    'profiles': (profile_urls, 'profiles'),
+    'groups': (group_urls, None),
+}
+
+
+def last_ids():
+    """Последние id постов и авторов: сколько кусков в разделах."""
+    return feed_cache.get_fragment(
+        'sitemap_last_ids', 'index', [],
+        lambda: Post.objects.aggregate(
+            posts=Max('pk'), profiles=Max('author_id')
+        ),
+    )
+
+
+def chunk_count(section, last):
+    last_key = SECTIONS[section][1]
+    if last_key is None:
+        return 1
+    return 0 if last[last_key] is None else chunk_of(last[last_key]) + 1
+
+
+def chunk_scope(section, chunk):
+    if SECTIONS[section][1] is None:
+        return 'index'
+    return f'sitemap:{section}:{chunk}'
+
+
+def invalidate_post(post):
+    feed_cache.bump(
+        chunk_scope('posts', chunk_of(post.pk)),
+        chunk_scope('profiles', chunk_of(post.author_id)),
+    )
+
+
+def invalidate_posts(posts):
+    """invalidate_post для пачки постов одним bump."""
+    feed_cache.bump(*{
+        scope
+        for post in posts
+        for scope in (
+            chunk_scope('posts', chunk_of(post.pk)),
+            chunk_scope('profiles', chunk_of(post.author_id)),
+        )
+    })
+
+
+def invalidate_profile(user):
+    feed_cache.bump(chunk_scope('profiles', chunk_of(user.pk)))
+
+
+@query_budget(1)
+def sitemap_index(request):
+    last = last_ids()
+    chunks = [
+        request.build_absolute_uri(
+            reverse('posts:sitemap_chunk', args=[section, chunk])
+        )
+        for section in SECTIONS
+        for chunk in range(chunk_count(section, last))
+    ]
+    return render(
+        request, 'sitemaps/index.xml', {'chunks': chunks},
+        content_type='application/xml',
+    )
+
+
+@query_budget(2)
+def sitemap_chunk(request, section, chunk):
+    if section not in SECTIONS:
+        raise Http404('Нет такого раздела карты сайта.')
+    last = last_ids()
+    if chunk >= chunk_count(section, last):
+        raise Http404('Нет такого куска карты сайта.')
+    last_key = SECTIONS[section][1]
+    finished = last_key is not None and (
+        last[last_key] >= id_range(chunk)[1] - 1
+    )
+    body = feed_cache.get_fragment(
+        'sitemap', chunk_scope(section, chunk),
+        [section, chunk, request.scheme, request.get_host()],
+        lambda: render_to_string('sitemaps/urlset.xml', {
+            'urls': [
+                (request.build_absolute_uri(location), lastmod)
+                for location, lastmod in SECTIONS[section][0](chunk)
+            ],
+        }),
+        forever=finished,
+    )
+    return HttpResponse(body, content_type='application/xml')
@@ -0,0 +1,142 @@
+"""RSS и Atom с постами группы и автора.
+
+Готовый документ хранится в общем кеше в области группы или автора и
+пересобирается только после изменения их постов. Ответ несёт ETag и
+Last-Modified, на условный GET отдаётся 304 без тела.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.syndication.views import Feed
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import parse_http_date_safe, quote_etag
+from django.utils.text import Truncator
+
+from core.query_budget import query_budget
+
+from . import feed_cache
+from .groups import group_cache
+
+User = get_user_model()
+
+
+class PostsFeed(Feed):
+    """Последние посты объекта: у группы и автора они в obj.posts."""
+
+    def items(self, obj):
+        return obj.posts.select_related('author')[
+            :settings.SYNDICATION_ITEMS
+        ]
+
+    def item_title(self, post):
+        return Truncator(post.text).words(10)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=[post.pk])
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_updateddate(self, post):
+        return post.updated_at
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        group = group_cache.get(slug)
+        if group is None:
+            raise Http404('Группа не найдена.')
+        return group
+
+    def title(self, group):
+        return group.title
+
+    def link(self, group):
+        return reverse('posts:group_list', args=[group.slug])
+
+    def description(self, group):
+        return group.description
+
+
+class GroupAtomFeed(GroupFeed):
+    feed_type = Atom1Feed
+    subtitle = GroupFeed.description
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Посты {author.get_full_name() or author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+    def description(self, author):
+        return f'Последние записи пользователя {author.username}'
+
+
+class AuthorAtomFeed(AuthorFeed):
+    feed_type = Atom1Feed
+    subtitle = AuthorFeed.description
+
+
+GROUP_FEEDS = {'rss': GroupFeed(), 'atom': GroupAtomFeed()}
+AUTHOR_FEEDS = {'rss': AuthorFeed(), 'atom': AuthorAtomFeed()}
+
+
+def serve(feed, scope, request, **kwargs):
+    """Фид из кеша области scope с ответом 304 на условный GET."""
+    def render():
+        response = feed(request, **kwargs)
+        return {
+            'content': response.content,
+            'content_type': response['Content-Type'],
+            'last_modified': response.get('Last-Modified'),
+            'etag': quote_etag(hashlib.md5(response.content).hexdigest()),
+        }
+
+    document = feed_cache.get_fragment(
+        'syndication', scope,
+        [type(feed).__name__, request.scheme, request.get_host(),
+         *kwargs.values()],
+        render,
+    )
+    response = HttpResponse(
+        document['content'], content_type=document['content_type']
+    )
+    response['ETag'] = document['etag']
+    last_modified = None
+    if document['last_modified']:
+        response['Last-Modified'] = document['last_modified']
+        last_modified = parse_http_date_safe(document['last_modified'])
+    return get_conditional_response(
+        request, etag=document['etag'], last_modified=last_modified,
+        response=response,
+    )
+
+
+@query_budget(2)
+def group_feed(request, slug, feed_type):
+    group = group_cache.get(slug)
+    if group is None:
+        raise Http404('Группа не найдена.')
+    return serve(GROUP_FEEDS[feed_type], group, request, slug=slug)
+
+
+@query_budget(3)
+def author_feed(request, username, feed_type):
+    author = get_object_or_404(User, username=username)
+    return serve(AUTHOR_FEEDS[feed_type], author, request, username=username)
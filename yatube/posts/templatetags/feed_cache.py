@@ -0,0 +1,103 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from .. import feed_cache, thumbnails
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, fragment_name, scope, vary_on):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.scope = scope
+        self.vary_on = vary_on
+
+    def render(self, context):
+        return feed_cache.get_fragment(
+            self.fragment_name,
+            self.scope.resolve(context),
+            [var.resolve(context) for var in self.vary_on],
+            lambda: self.nodelist.render(context),
+        )
+
+
+@register.tag('feedcache')
+def do_feedcache(parser, token):
+    """
+    Кеширует фрагмент ленты до изменения объектов его области:
+
+        {% feedcache group_page group request.get_full_path %}
+            ...
+        {% endfeedcache %}
+
+    Область — строка 'index' либо группа, автор или пост; остальные
+    аргументы, как у {% cache %}, входят в ключ фрагмента.
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least 2 arguments."
+        )
+    nodelist = parser.parse(('endfeedcache',))
+    parser.delete_first_token()
+    return FeedCacheNode(
+        nodelist,
+        bits[1],
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
+
+
+def card_vary_on(post, in_group):
+    """Ключ карточки: updated_at меняет любая правка поста, а автор и
+    группа меняются без неё, поэтому их выводимые поля тоже в ключе."""
+    group = post.group
+    return [
+        post.pk, post.updated_at.timestamp(), in_group,
+        post.author.username, post.author.get_full_name(),
+        group and group.slug, group and group.description,
+    ]
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, template_name='includes/card.html'):
+    """
+    Отрендеренные карточки постов страницы из общего кеша:
+
+        {% post_cards page_obj as cards %}
+        {% for card in cards %}{{ card }}{% endfor %}
+
+    Карточка поста одинакова на главной, в профиле и в ленте подписок,
+    а в группе отличается только ссылкой на группу. Ключ — id поста,
+    его updated_at и выводимые поля автора и группы, без версий
+    областей, поэтому вся страница читается одним get_many. Карточки с
+    выдержкой из поиска не кешируются. Если хоть одну карточку нужно
+    отрендерить, варианты картинок всей страницы читаются одним запросом.
+    """
+    posts = list(posts)
+    card = context.template.engine.get_template(template_name)
+    in_group = bool(context.get('group'))
+    prefetched = False
+
+    def render(number):
+        nonlocal prefetched
+        if not prefetched:
+            thumbnails.prefetch_variants(posts)
+            prefetched = True
+        with context.push(post=posts[number]):
+            return card.render(context)
+
+    cached = [
+        number for number, post in enumerate(posts)
+        if not getattr(post, 'search_snippet', None)
+    ]
+    cards = dict(zip(cached, feed_cache.get_fragments(
+        'post_card',
+        [card_vary_on(posts[number], in_group) for number in cached],
+        render,
+    ))) if cached else {}
+    return [
+        mark_safe(cards[number]) if number in cards else render(number)
+        for number in range(len(posts))
+    ]
@@ -0,0 +1,37 @@
+from django import template
+
+from ..thumbnails import FEED_HEIGHT, FEED_WIDTH, cached_variants
+
+register = template.Library()
+
+FORMAT_MIME_TYPES = {
+    'WEBP': 'image/webp',
+    'AVIF': 'image/avif',
+}
+
+
+@register.inclusion_tag('includes/picture.html')
+def post_picture(image, sizes='(max-width: 960px) 100vw, 960px'):
+    """
+    <picture> с srcset по готовым вариантам картинки поста.
+
+    Пока воркер не создал основной вариант, выводится заглушка. Варианты,
+    заранее прочитанные prefetch_variants, берутся из поста.
+    """
+    variants = {}
+    if image:
+        prefetched = getattr(image.instance, 'image_variants', None)
+        variants = dict(
+            cached_variants(image) if prefetched is None else prefetched
+        )
+    fallback = variants.pop(None, [])
+    return {
+        'image': image,
+        'sizes': sizes,
+        'fallback': fallback,
+        'sources': [
+            (FORMAT_MIME_TYPES.get(image_format), ready)
+            for image_format, ready in variants.items()
+        ],
+        'aspect_ratio': f'{FEED_WIDTH} / {FEED_HEIGHT}',
+    }
@@ -0,0 +1,109 @@
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(POST_AMOUNT=3)
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='NoName1')
+        cls.reader = User.objects.create_user(username='NoName2')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number} ' * 20
+            )
+            for number in range(5)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Коммент'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def get_json(self, client, url, **extra):
+        response = client.get(url, **extra)
+        return response, json.loads(response.content)
+
+    def test_index_projection_and_cursor(self):
+        """Лента отдаёт проекцию полей и ссылку на следующую страницу."""
+        response, data = self.get_json(
+            self.guest_client, reverse('api:index')
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(data['results'][0]),
+            {'id', 'text', 'pub_date', 'updated_at', 'image', 'author',
+             'group', 'comments_count'},
+        )
+        self.assertEqual(
+            [post['id'] for post in data['results']],
+            [post.pk for post in self.posts[:-4:-1]],
+        )
+        self.assertIsNone(data['previous'])
+        _, second = self.get_json(self.guest_client, data['next'])
+        self.assertEqual(
+            [post['id'] for post in second['results']],
+            [self.posts[1].pk, self.posts[0].pk],
+        )
+        self.assertEqual(second['results'][1]['comments_count'], 1)
+        self.assertIsNone(second['next'])
+
+    def test_group_and_profile(self):
+        """Группа и профиль отдают заголовок и посты, 404 — в JSON."""
+        _, data = self.get_json(self.guest_client, reverse(
+            'api:group_list', kwargs={'slug': self.group.slug}
+        ))
+        self.assertEqual(data['group']['title'], self.group.title)
+        self.assertEqual(len(data['results']), 3)
+        _, data = self.get_json(self.guest_client, reverse(
+            'api:profile', kwargs={'username': self.author.username}
+        ))
+        self.assertEqual(data['author']['posts_count'], 5)
+        response, data = self.get_json(self.guest_client, reverse(
+            'api:group_list', kwargs={'slug': 'missing'}
+        ))
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('detail', data)
+
+    def test_follow_requires_login(self):
+        """Лента подписок анониму отвечает 401, читателю — постами."""
+        url = reverse('api:follow_index')
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 401)
+        _, data = self.get_json(self.reader_client, url)
+        self.assertEqual(data['results'][0]['id'], self.posts[-1].pk)
+
+    def test_post_detail_comments(self):
+        """Пост отдаётся вместе с комментариями."""
+        _, data = self.get_json(self.guest_client, reverse(
+            'api:post_detail', kwargs={'post_id': self.posts[0].pk}
+        ))
+        self.assertEqual(data['post']['id'], self.posts[0].pk)
+        self.assertEqual(data['comments'][0]['author'], 'NoName2')
+        self.assertIsNone(data['next_cursor'])
+
+    def test_gzip(self):
+        """Ответ сжимается, если клиент принимает gzip."""
+        response = self.guest_client.get(
+            reverse('api:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data['results']), 3)
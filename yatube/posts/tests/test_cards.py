@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.testing import run_on_commit
+
+from .. import feed_cache
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName1')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Пост {number}'
+            )
+            for number in range(10)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_shared_between_feeds(self):
+        """Карточка из главной без изменений поста идёт в профиль."""
+        post = self.posts[0]
+        self.client.get(reverse('posts:index'))
+        # update() не шлёт сигналов: кеш об изменении не знает.
+        Post.objects.filter(pk=post.pk).update(text='Новый текст')
+        profile = reverse('posts:profile', args=[self.user.username])
+        self.assertContains(self.client.get(profile), 'Пост 0')
+        post.refresh_from_db()
+        with run_on_commit():
+            post.save()
+        self.assertContains(self.client.get(profile), 'Новый текст')
+
+    def test_page_read_with_one_get_many(self):
+        """Карточки страницы читаются одним get_many."""
+        self.client.get(reverse('posts:index'))
+        with mock.patch.object(
+            feed_cache.cache, 'get_many', wraps=feed_cache.cache.get_many
+        ) as get_many:
+            response = self.client.get(
+                reverse('posts:profile', args=[self.user.username])
+            )
+        card_reads = [
+            call for call in get_many.call_args_list
+            if not all(key.startswith('feed:version') for key in call[0][0])
+        ]
+        self.assertEqual(len(card_reads), 1)
+        self.assertEqual(len(card_reads[0][0][0]), 10)
+        # Версии постов для карточек не читаются отдельным запросом.
+        self.assertFalse(any(
+            key.startswith('feed:version:post:')
+            for call in get_many.call_args_list for key in call[0][0]
+        ))
+        self.assertContains(response, 'все записи группы', count=10)
+
+    def test_post_edit_keeps_other_cards(self):
+        """Правка поста сбрасывает только его карточку."""
+        self.client.get(reverse('posts:index'))
+        post = Post.objects.get(pk=self.posts[0].pk)
+        with run_on_commit():
+            post.save()
+        get_many = feed_cache.cache.get_many
+        reads = []
+
+        def record(keys, *args, **kwargs):
+            found = get_many(keys, *args, **kwargs)
+            reads.append((keys, found))
+            return found
+
+        with mock.patch.object(feed_cache.cache, 'get_many', record):
+            self.client.get(
+                reverse('posts:profile', args=[self.user.username])
+            )
+        keys, found = next(
+            (keys, found) for keys, found in reads
+            if len(keys) == len(self.posts)
+        )
+        self.assertEqual(len(found), len(self.posts) - 1)
+
+    def test_group_cards_without_group_link(self):
+        """В группе карточки без ссылки на группу, на главной — с ней."""
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(
+            reverse('posts:group_list', args=[self.group.slug])
+        )
+        self.assertNotContains(response, 'все записи группы')
+        self.assertContains(
+            self.client.get(reverse('posts:index')), 'все записи группы'
+        )
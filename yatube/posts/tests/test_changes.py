@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import changes
+from ..models import Change, Comment, Group, Post
+
+User = get_user_model()
+
+
+class ChangeLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName1')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            author=self.user, group=self.group, text='Тестовый пост'
+        )
+        self.cursor = changes.cursor()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_edit_updates_timestamp_and_log(self):
+        """Правка поста сдвигает updated_at и попадает в журнал."""
+        created_at = self.post.updated_at
+        self.client.post(
+            reverse('posts:post_edit', args=[self.post.pk]),
+            {'text': 'Новый текст'},
+        )
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated_at, created_at)
+        self.assertEqual(
+            changes.since(self.cursor)['changed'], {'post': [self.post.pk]}
+        )
+
+    def test_last_action_wins(self):
+        """Изменённый, а затем удалённый объект есть только в deleted."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Коммент'
+        )
+        comment_id = comment.pk
+        self.post.save()
+        comment.delete()
+        result = changes.since(self.cursor)
+        self.assertEqual(result['changed'], {'post': [self.post.pk]})
+        self.assertEqual(result['deleted'], {'comment': [comment_id]})
+        self.assertEqual(result['cursor'], changes.cursor())
+        self.assertEqual(
+            changes.since(result['cursor']),
+            {'cursor': result['cursor'], 'more': False,
+             'changed': {}, 'deleted': {}},
+        )
+
+    def test_group_deletion_records_posts(self):
+        """Удаление группы отмечает её посты изменёнными."""
+        group = Group.objects.create(title='Группа', slug='gone')
+        post = Post.objects.create(author=self.user, group=group, text='Пост')
+        group_id, cursor = group.pk, changes.cursor()
+        group.delete()
+        result = changes.since(cursor)
+        self.assertEqual(result['changed'], {'post': [post.pk]})
+        self.assertEqual(result['deleted'], {'group': [group_id]})
+
+    @override_settings(CHANGES_PAGE_SIZE=2)
+    def test_api_pages(self):
+        """API отдаёт журнал страницами по курсору since."""
+        for _ in range(3):
+            self.post.save()
+        Group.objects.filter(pk=self.group.pk).update(title='Без сигнала')
+        self.group.save()
+        url = reverse('api:changes')
+        data = self.client.get(
+            url, {'since': self.cursor, 'model': Change.POST}
+        ).json()
+        self.assertTrue(data['more'])
+        self.assertEqual(data['changed'], {'post': [self.post.pk]})
+        data = self.client.get(data['next']).json()
+        self.assertFalse(data['more'])
+        self.assertIsNone(data['next'])
+        self.assertEqual(
+            self.client.get(url, {'model': 'user'}).status_code, 400
+        )
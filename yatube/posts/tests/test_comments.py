@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..comments import CommentThread
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_PER_PAGE=5, COMMENT_MAX_DEPTH=2)
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName1')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.roots = [
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Коммент {number}'
+            )
+            for number in range(7)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def reply(self, parent, text):
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': text, 'parent': parent.pk},
+        )
+        return Comment.objects.get(text=text)
+
+    def test_cursor_pages(self):
+        """Корни идут от старых к новым страницами по курсору."""
+        first = CommentThread(self.post)
+        self.assertEqual(
+            [comment.pk for comment in first],
+            [comment.pk for comment in self.roots[:5]],
+        )
+        second = CommentThread(self.post, first.next_cursor)
+        self.assertEqual(
+            [comment.pk for comment in second],
+            [comment.pk for comment in self.roots[5:]],
+        )
+        self.assertIsNone(second.next_cursor)
+
+    def test_replies_follow_their_root(self):
+        """Ответы идут сразу под своим корнем с нужной глубиной."""
+        answer = self.reply(self.roots[0], 'Ответ')
+        nested = self.reply(answer, 'Ответ на ответ')
+        too_deep = self.reply(nested, 'Слишком глубоко')
+        self.assertEqual(too_deep.parent, answer)
+        comments = list(CommentThread(self.post))
+        self.assertEqual(
+            [(comment.pk, comment.depth) for comment in comments[:4]],
+            [
+                (self.roots[0].pk, 0), (answer.pk, 1),
+                (nested.pk, 2), (too_deep.pk, 2),
+            ],
+        )
+        self.assertEqual(comments[4], self.roots[1])
+
+    @override_settings(COMMENT_REPLIES_PER_PAGE=2)
+    def test_replies_paginated(self):
+        """Под корнем не больше страницы ответов, остальные догружаются."""
+        replies = [
+            self.reply(self.roots[0], f'Ответ {number}') for number in range(5)
+        ]
+        comments = list(CommentThread(self.post))
+        self.assertEqual(
+            [comment.pk for comment in comments[:4]],
+            [self.roots[0].pk, replies[0].pk, replies[1].pk,
+             self.roots[1].pk],
+        )
+        self.assertEqual(comments[2].more_replies, replies[1].path)
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        response = self.client.get(
+            url, {'replies_after': comments[2].more_replies}
+        )
+        self.assertContains(response, 'Ответ 3')
+        self.assertNotContains(response, 'Ответ 4')
+        self.assertContains(response, 'Ещё ответы')
+        data = self.client.get(url, {
+            'replies_after': replies[3].path, 'format': 'json',
+        }).json()
+        self.assertEqual(
+            [comment['id'] for comment in data['comments']], [replies[4].pk]
+        )
+        self.assertIsNone(data['comments'][0]['more_replies'])
+        self.assertEqual(
+            self.client.get(url, {'replies_after': 'bad'}).status_code, 404
+        )
+
+    def test_reply_to_foreign_post_is_root(self):
+        """Ответ на комментарий другого поста становится корневым."""
+        other = Post.objects.create(author=self.user, text='Другой пост')
+        foreign = Comment.objects.create(
+            post=other, author=self.user, text='Чужой'
+        )
+        self.assertIsNone(self.reply(foreign, 'Ответ').parent)
+
+    def test_fragment_endpoint(self):
+        """Следующая страница отдаётся фрагментом и в JSON."""
+        first = CommentThread(self.post)
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        response = self.client.get(url, {'cursor': first.next_cursor})
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertContains(response, self.roots[6].text)
+        self.assertNotContains(response, 'Показать ещё')
+        data = self.client.get(
+            url, {'cursor': first.next_cursor, 'format': 'json'}
+        ).json()
+        self.assertEqual(
+            [comment['id'] for comment in data['comments']],
+            [self.roots[5].pk, self.roots[6].pk],
+        )
+        self.assertIsNone(data['next_cursor'])
+
+    def test_post_detail_renders_first_page(self):
+        """Страница поста показывает первую страницу и ссылку дальше."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertContains(response, self.roots[4].text)
+        self.assertNotContains(response, self.roots[5].text)
+        self.assertContains(response, 'data-fragment-url')
@@ -1,15 +1,20 @@
 import shutil
 import tempfile
 from http import HTTPStatus
+from io import BytesIO, StringIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
+
+from core.testing import run_on_commit
 
 from ..forms import PostForm
-from ..models import Comment, Group, Post
+from ..models import Comment, Group, Post, ThumbnailTask
 
 User = get_user_model()
 
@@ -43,6 +48,14 @@ class PostCreateFormTests(TestCase):
         cls.comment_form_data = {
             'text': f'{cls.comment.text}',
         }
+        cls.small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
 
     def setUp(cls):
         cls.guest_client = Client()
@@ -59,17 +72,9 @@ class PostCreateFormTests(TestCase):
     def test_create_form_with_image(self):
         """Форма с картинкой создает запись в Post."""
         posts_count = Post.objects.count()
-        small_gif = (
-            b'\x47\x49\x46\x38\x39\x61\x02\x00'
-            b'\x01\x00\x80\x00\x00\x00\x00\x00'
-            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
-            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
-            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
-            b'\x0A\x00\x3B'
-        )
         uploaded = SimpleUploadedFile(
             name='small.gif',
-            content=small_gif,
+            content=self.small_gif,
             content_type='image/gif'
         )
         form_data = {
@@ -84,13 +89,61 @@ class PostCreateFormTests(TestCase):
         )
         self.assertRedirects(response, f'/profile/{self.author_user}/')
         self.assertEqual(Post.objects.count(), posts_count + 1)
-        self.assertTrue(
-            Post.objects.filter(
-                author=self.author_user,
-                text=self.text_post.text,
-                group=self.group.id,
-                image='posts/small.gif'
-            ).exists()
+        post = Post.objects.get(
+            author=self.author_user,
+            text=self.text_post.text,
+            group=self.group.id,
+        )
+        self.assertRegex(post.image.name, r'^posts/[0-9a-f]{2}/\w{64}\.gif$')
+
+    def test_thumbnail_generated_in_background(self):
+        """Миниатюра создаётся воркером, до этого показывается заглушка."""
+        # Своё содержимое: миниатюры одинаковых картинок общие.
+        content = BytesIO()
+        Image.new('RGB', (3, 1), 'green').save(content, 'GIF')
+        uploaded = SimpleUploadedFile(
+            name='thumb.gif',
+            content=content.getvalue(),
+            content_type='image/gif'
+        )
+        with run_on_commit():
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={'text': 'Пост с картинкой', 'image': uploaded},
+            )
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertTrue(ThumbnailTask.objects.filter(post=post).exists())
+        url = reverse('posts:post_detail', kwargs={'post_id': post.id})
+        index = reverse('posts:index')
+        for page in (url, index):
+            self.assertNotContains(
+                self.guest_client.get(page), '<img class="card-img'
+            )
+        with run_on_commit():
+            call_command('process_thumbnails', once=True, workers=1,
+                         stdout=StringIO())
+        self.assertFalse(ThumbnailTask.objects.exists())
+        response = self.guest_client.get(url)
+        self.assertContains(response, '<img class="card-img')
+        for width in settings.IMAGE_VARIANT_WIDTHS:
+            with self.subTest(width=width):
+                self.assertContains(response, f' {width}w')
+        # Карточка на главной ключится по updated_at, его обновил воркер.
+        self.assertContains(
+            self.guest_client.get(index), '<img class="card-img'
+        )
+
+    def test_backfill_image_variants(self):
+        """Команда создаёт варианты картинок существующих постов."""
+        post = Post.objects.create(
+            author=self.author_user,
+            text='Старый пост с картинкой',
+            image=SimpleUploadedFile('old.gif', self.small_gif),
+        )
+        url = reverse('posts:post_detail', kwargs={'post_id': post.id})
+        call_command('backfill_image_variants', workers=1, stdout=StringIO())
+        self.assertContains(
+            self.guest_client.get(url), '<img class="card-img'
         )
 
     def test_edit_post(self):
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.testing import run_on_commit
+
+from ..groups import GroupPaginator, directory, group_cache
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class GroupCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName1')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.empty = Group.objects.create(
+            title='Пустая группа', slug='empty', description=''
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Пост {number}'
+            )
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_slug_cache(self):
+        """Группа берётся из памяти, пока её не изменили."""
+        group_cache.get(self.group.slug)
+        with self.assertNumQueries(0):
+            self.assertEqual(group_cache.get(self.group.slug), self.group)
+        self.group.title = 'Новый заголовок'
+        with run_on_commit():
+            self.group.save()
+        with self.assertNumQueries(1):
+            group = group_cache.get(self.group.slug)
+        self.assertEqual(group.title, 'Новый заголовок')
+        self.assertIsNone(group_cache.get('missing'))
+
+    def test_directory(self):
+        """Каталог считает посты и дату последнего, новый пост виден."""
+        groups = {group['slug']: group for group in directory()}
+        self.assertEqual(groups['test-slug']['posts_count'], 3)
+        self.assertEqual(
+            groups['test-slug']['latest_pub_date'], self.posts[-1].pub_date
+        )
+        self.assertEqual(groups['empty']['posts_count'], 0)
+        with self.assertNumQueries(0):
+            directory()
+        with run_on_commit():
+            Post.objects.create(
+                author=self.user, group=self.empty, text='Пост'
+            )
+        groups = {group['slug']: group for group in directory()}
+        self.assertEqual(groups['empty']['posts_count'], 1)
+
+    def test_directory_counters(self):
+        """Каталог читает счётчики групп одним запросом без агрегатов."""
+        post = Post.objects.get(pk=self.posts[-1].pk)
+        post.group = self.empty
+        post.save()
+        with self.assertNumQueries(1) as queries:
+            groups = {group['slug']: group for group in directory()}
+        self.assertNotIn('COUNT(', queries.captured_queries[0]['sql'])
+        self.assertEqual(groups['test-slug']['posts_count'], 2)
+        self.assertEqual(
+            groups['test-slug']['latest_pub_date'], self.posts[1].pub_date
+        )
+        self.assertEqual(groups['empty']['posts_count'], 1)
+        self.assertEqual(groups['empty']['latest_pub_date'], post.pub_date)
+        with run_on_commit():
+            post.delete()
+        groups = {group['slug']: group for group in directory()}
+        self.assertEqual(groups['empty']['posts_count'], 0)
+        self.assertIsNone(groups['empty']['latest_pub_date'])
+
+    def test_directory_page(self):
+        """Страница каталога выводит группы со ссылками."""
+        response = Client().get(reverse('posts:group_directory'))
+        self.assertEqual(len(response.context['groups']), 2)
+        self.assertContains(
+            response, reverse('posts:group_list', args=[self.group.slug])
+        )
+
+    def test_first_page_cached(self):
+        """Первая страница группы берётся из кеша до нового поста."""
+        GroupPaginator(self.group, 2).get_page(None)
+        with self.assertNumQueries(0):
+            page = GroupPaginator(self.group, 2).get_page(None)
+        self.assertEqual(list(page), self.posts[:0:-1])
+        self.assertTrue(page.has_next())
+        with run_on_commit():
+            post = Post.objects.create(
+                author=self.user, group=self.group, text='Свежий'
+            )
+        self.assertEqual(GroupPaginator(self.group, 2).get_page(None)[0], post)
@@ -0,0 +1,188 @@
+import shutil
+import tempfile
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetMixin
+
+from .. import thumbnails
+from ..models import Comment, Follow, Group, Post
+from ..query_plans import explain, feed_queries
+from .test_uploads import image_file
+
+User = get_user_model()
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        for number in range(15):
+            cls.post = Post.objects.create(
+                author=cls.author,
+                text=f'Тестовый пост {number}',
+                group=cls.group,
+            )
+        for number in range(30):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Коммент {number}'
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_read_views_within_budget(self):
+        """Страницы чтения укладываются в бюджет запросов."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            for client in (Client(), self.reader_client):
+                with self.subTest(url=url):
+                    cache.clear()
+                    self.assertWithinQueryBudget(url, client)
+        self.assertWithinQueryBudget(
+            reverse('posts:follow_index'), self.reader_client
+        )
+
+    def test_write_views_within_budget(self):
+        """Изменяющие view укладываются в бюджет запросов."""
+        self.assertWithinQueryBudget(
+            reverse('posts:post_create'), self.author_client, 'post',
+            {'text': 'Новый пост', 'group': self.group.pk},
+        )
+        self.assertWithinQueryBudget(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            self.author_client, 'post', {'text': 'Правка'},
+        )
+        self.assertWithinQueryBudget(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            self.reader_client, 'post', {'text': 'Коммент'},
+        )
+        self.assertWithinQueryBudget(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'}),
+            self.reader_client,
+        )
+        self.assertWithinQueryBudget(
+            reverse('posts:profile_follow', kwargs={'username': 'author'}),
+            self.reader_client,
+        )
+
+    def test_budget_exceeded_fails(self):
+        """Превышение бюджета роняет тест."""
+        index = reverse('posts:index')
+        view = Client().get(index).resolver_match.func
+        budget = view.query_budget
+        view.query_budget = 0
+        try:
+            with self.assertRaises(AssertionError):
+                self.assertWithinQueryBudget(index, self.reader_client)
+        finally:
+            view.query_budget = budget
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug', description='',
+        )
+        for number in range(settings.POST_AMOUNT):
+            post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}',
+                image=image_file('small.gif', (number + 1, 1)),
+            )
+            thumbnails.generate(post.image.name)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_image_feeds_within_budget(self):
+        """Ленты с картинками на холодном кеше укладываются в бюджет."""
+        reader_client = Client()
+        reader_client.force_login(self.reader)
+        urls = (
+            (reverse('posts:index'), Client()),
+            (reverse('posts:group_list', args=[self.group.slug]), Client()),
+            (reverse('posts:profile', args=[self.author]), Client()),
+            (reverse('posts:follow_index'), reader_client),
+        )
+        for url, client in urls:
+            with self.subTest(url=url):
+                cache.clear()
+                response = self.assertWithinQueryBudget(url, client)
+                self.assertContains(
+                    response, 'srcset', count=settings.POST_AMOUNT
+                )
+
+
+class FeedIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Тестовый пост', group=cls.group
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @skipUnless(connection.vendor == 'sqlite', 'план запроса SQLite')
+    def test_feed_queries_use_composite_indexes(self):
+        """Ленты читаются по составным индексам без сортировки."""
+        queries = feed_queries(
+            self.reader, self.author, self.group, self.post
+        )
+        expected = {
+            'group_list': 'post_group_pub_date_idx',
+            'profile': 'post_author_pub_date_idx',
+            'post_comments': 'comment_post_created_idx',
+            'comment_replies': 'comment_post_path_idx (post_id=? AND path>?',
+        }
+        for name, index in expected.items():
+            with self.subTest(query=name):
+                plan = ' '.join(explain(queries[name]))
+                self.assertIn(index, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_follow_is_unique(self):
+        """Повторная подписка отклоняется на уровне базы."""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.author)
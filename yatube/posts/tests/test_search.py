@@ -0,0 +1,89 @@
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import search
+from ..models import Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName1')
+        cls.kitten_post = Post.objects.create(
+            author=cls.user, text='Котята <b>играют</b> с клубком'
+        )
+        cls.dog_post = Post.objects.create(
+            author=cls.user, text='Собака гуляет в парке'
+        )
+
+    def test_search_finds_and_highlights(self):
+        """Поиск находит пост по префиксу и подсвечивает совпадение."""
+        response = self.client.get(reverse('posts:search'), {'q': 'котят'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(
+            [post.pk for post in page_obj], [self.kitten_post.pk]
+        )
+        self.assertContains(response, '<mark>Котята</mark>')
+        self.assertContains(response, '&lt;b&gt;играют&lt;/b&gt;')
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        self.dog_post.text = 'Кошка спит'
+        self.dog_post.save()
+        url = reverse('posts:search')
+        self.assertEqual(
+            len(self.client.get(url, {'q': 'собака'}).context['page_obj']), 0
+        )
+        self.assertEqual(
+            len(self.client.get(url, {'q': 'кошка'}).context['page_obj']), 1
+        )
+        self.dog_post.delete()
+        self.assertEqual(
+            len(self.client.get(url, {'q': 'кошка'}).context['page_obj']), 0
+        )
+
+    def test_search_paginates(self):
+        """Выдача поиска разбита на страницы."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Котята {number}')
+            for number in range(12)
+        )
+        search.rebuild()
+        url = reverse('posts:search')
+        response = self.client.get(url, {'q': 'котята'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertContains(response, f'?{urlencode({"q": "котята"})}&page=2')
+        response = self.client.get(url, {'q': 'котята', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    @override_settings(POST_AMOUNT=1, SEARCH_MAX_PAGES=8)
+    def test_search_pages_without_count(self):
+        """Страницы поиска без COUNT(*), номеров ссылок немного."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Котята {number}')
+            for number in range(12)
+        )
+        search.rebuild()
+        url = reverse('posts:search')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, {'q': 'котята', 'page': 8})
+        self.assertFalse(any(
+            'count(' in query['sql'].lower() for query in context
+        ))
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.number, 8)
+        self.assertFalse(page_obj.has_next())
+        self.assertEqual(
+            list(page_obj.paginator.page_range), [3, 4, 5, 6, 7, 8]
+        )
+        self.assertNotContains(response, 'page=1">1<')
+        response = self.client.get(url, {'q': 'котята', 'page': 9})
+        self.assertEqual(response.context['page_obj'].number, 1)
@@ -0,0 +1,88 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetMixin
+from core.testing import run_on_commit
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(SITEMAP_CHUNK_SIZE=4)
+class SitemapTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName1')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Пост {number}'
+            )
+            for number in range(6)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def chunk_url(self, section, chunk):
+        return reverse('posts:sitemap_chunk', args=[section, chunk])
+
+    def test_index_lists_chunks(self):
+        """Индекс ссылается на куски всех разделов."""
+        response = self.assertWithinQueryBudget(reverse('posts:sitemap'))
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        last_chunk = self.posts[-1].pk // 4
+        for chunk in range(last_chunk + 1):
+            self.assertContains(response, self.chunk_url('posts', chunk))
+        self.assertNotContains(
+            response, self.chunk_url('posts', last_chunk + 1)
+        )
+        self.assertContains(response, self.chunk_url('profiles', 0))
+        self.assertContains(response, self.chunk_url('groups', 0))
+
+    def test_chunk_holds_id_range(self):
+        """Кусок содержит посты своего диапазона id."""
+        post = self.posts[-1]
+        response = self.assertWithinQueryBudget(
+            self.chunk_url('posts', post.pk // 4)
+        )
+        self.assertContains(
+            response, reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertContains(response, '<lastmod>', count=post.pk % 4 + 1)
+        self.assertEqual(
+            self.client.get(self.chunk_url('posts', 100)).status_code, 404
+        )
+        self.assertEqual(
+            self.client.get(self.chunk_url('users', 0)).status_code, 404
+        )
+
+    def test_finished_chunk_rebuilt_on_change(self):
+        """Законченный кусок берётся из кеша до изменения его поста."""
+        post = self.posts[0]
+        url = self.chunk_url('posts', post.pk // 4)
+        location = reverse('posts:post_detail', args=[post.pk]) + '<'
+        self.assertContains(self.client.get(url), location)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        with run_on_commit():
+            post.delete()
+        self.assertNotContains(self.client.get(url), location)
+
+    def test_chunk_rebuilt_after_group_delete(self):
+        """Удаление группы меняет lastmod её постов в законченном куске."""
+        post = self.posts[0]
+        url = self.chunk_url('posts', post.pk // 4)
+        self.client.get(url)
+        with run_on_commit():
+            Group.objects.filter(pk=self.group.pk).delete()
+        post.refresh_from_db()
+        self.assertContains(
+            self.client.get(url), post.updated_at.isoformat()
+        )
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetMixin
+from core.testing import run_on_commit
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class SyndicationTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName1')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Тестовый пост'
+        )
+        cls.urls = {
+            'application/rss+xml': (
+                reverse('posts:group_rss', args=[cls.group.slug]),
+                reverse('posts:profile_rss', args=[cls.user.username]),
+            ),
+            'application/atom+xml': (
+                reverse('posts:group_atom', args=[cls.group.slug]),
+                reverse('posts:profile_atom', args=[cls.user.username]),
+            ),
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds(self):
+        """RSS и Atom группы и автора содержат пост."""
+        for content_type, urls in self.urls.items():
+            for url in urls:
+                with self.subTest(url=url):
+                    response = self.assertWithinQueryBudget(url)
+                    self.assertTrue(
+                        response['Content-Type'].startswith(content_type)
+                    )
+                    self.assertContains(response, 'Тестовый пост')
+                    self.assertContains(response, reverse(
+                        'posts:post_detail', args=[self.post.pk]
+                    ))
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:group_rss', args=['missing'])
+            ).status_code,
+            404,
+        )
+
+    def test_conditional_get(self):
+        """Повтор с ETag или Last-Modified получает 304 из кеша."""
+        url = self.urls['application/rss+xml'][0]
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(
+            self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            ).status_code,
+            304,
+        )
+
+    def test_new_post_changes_feed(self):
+        """Новый пост меняет фид и его ETag."""
+        url = self.urls['application/atom+xml'][1]
+        etag = self.client.get(url)['ETag']
+        with run_on_commit():
+            Post.objects.create(author=self.user, text='Свежий пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Свежий пост')
@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import timeline
+from ..models import Follow, PopularAuthor, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Старый пост',
+        )
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_follow_backfills_and_post_fans_out(self):
+        """Подписка заполняет ленту, новый пост раскладывается по ленте."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(
+            list(
+                TimelineEntry.objects.filter(user=self.reader)
+                .values_list('post', flat=True)
+            ),
+            [new_post.pk, self.old_post.pk]
+        )
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [new_post.pk, self.old_post.pk]
+        )
+
+    def test_unfollow_prunes_timeline(self):
+        """Отписка удаляет посты автора из ленты."""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        follow.delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_merged_on_read(self):
+        """Посты популярного автора подмешиваются при чтении ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1, TIMELINE_FANOUT_HYSTERESIS=0)
+    def test_author_below_limit_fanned_out(self):
+        """Посты автора раскладываются воркером, когда он ниже порога."""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        follow = Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertFalse(TimelineEntry.objects.filter(post=post))
+        follow.delete()
+        self.assertFalse(TimelineEntry.objects.filter(post=post))
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [item.pk for item in response.context['page_obj']],
+            [post.pk, self.old_post.pk],
+        )
+        self.assertEqual(timeline.process_batch(10), 1)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post)
+        )
+        self.assertFalse(PopularAuthor.objects.filter(author=self.author))
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [item.pk for item in response.context['page_obj']],
+            [post.pk, self.old_post.pk],
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1, TIMELINE_FANOUT_HYSTERESIS=1)
+    def test_settle_hysteresis(self):
+        """У самого порога отписка не ставит автора в очередь."""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        follow = Follow.objects.create(user=other, author=self.author)
+        follow.delete()
+        self.assertEqual(timeline.process_batch(10), 0)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(timeline.process_batch(10), 1)
@@ -0,0 +1,201 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.storage import ContentAddressedStorage
+from core.testing import run_on_commit
+
+from .. import feed_cache, sitemaps, thumbnails
+from ..models import Post, ThumbnailTask
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_file(name, size=(2, 1), image_format='GIF', **options):
+    buffer = BytesIO()
+    Image.new('RGB', size).save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class UploadValidationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName1')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create(self, uploaded):
+        return self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой', 'image': uploaded},
+        )
+
+    def assertRejected(self, response, message):
+        self.assertFormError(response, 'form', 'image', message)
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(IMAGE_MAX_UPLOAD_SIZE=20)
+    def test_too_large_file(self):
+        """Файл больше лимита обрывается при чтении."""
+        response = self.create(image_file('big.gif'))
+        self.assertRejected(response, 'Файл больше 20\xa0байт.')
+
+    def test_not_an_image(self):
+        """Не картинка отклоняется по заголовку."""
+        response = self.create(SimpleUploadedFile('fake.gif', b'not image'))
+        self.assertRejected(response, 'Загрузите правильное изображение.')
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_too_many_pixels(self):
+        """Размеры в пикселях проверяются до декодирования."""
+        response = self.create(image_file('wide.gif', (20, 10)))
+        self.assertRejected(
+            response, 'Слишком большое изображение: 20×10 пикселей.'
+        )
+
+    @override_settings(IMAGE_UPLOAD_FORMATS=('PNG',))
+    def test_format_not_allowed(self):
+        """Разрешены только форматы из IMAGE_UPLOAD_FORMATS."""
+        response = self.create(image_file('small.gif'))
+        self.assertRejected(response, 'Допустимые форматы: PNG.')
+
+    @override_settings(IMAGE_RELEASE_GRACE=0)
+    def test_exif_stripped_by_worker(self):
+        """Воркер убирает EXIF и поворачивает картинку по ориентации."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010f] = 'Camera'
+        self.create(image_file(
+            'photo.jpg', (4, 2), 'JPEG', exif=exif.tobytes()
+        ))
+        post = Post.objects.get()
+        name = post.image.name
+        scope = sitemaps.chunk_scope('posts', sitemaps.chunk_of(post.pk))
+        version = feed_cache.version(scope)
+        with run_on_commit():
+            new_name = thumbnails.strip_metadata(name)
+        self.assertEqual(Post.objects.get().image.name, new_name)
+        # update() обходит сигналы: кусок карты сайта сбрасывается явно.
+        self.assertNotEqual(feed_cache.version(scope), version)
+        self.assertFalse(default_storage.exists(name))
+        with default_storage.open(new_name) as stored:
+            image = Image.open(stored)
+            self.assertNotIn('exif', image.info)
+            self.assertEqual(image.size, (2, 4))
+        self.assertIsNone(thumbnails.strip_metadata(new_name))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SharedImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName1')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def post(self, name):
+        return Post.objects.create(
+            author=self.user, text='Пост', image=image_file(name)
+        )
+
+    def test_same_content_stored_once(self):
+        """Одна и та же картинка под разными именами — один файл."""
+        first, second = self.post('one.gif'), self.post('two.GIF')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(ContentAddressedStorage.is_hashed(first.image.name))
+        other = Post.objects.create(
+            author=self.user, text='Пост',
+            image=image_file('big.gif', (3, 3)),
+        )
+        self.assertNotEqual(other.image.name, first.image.name)
+
+    @override_settings(IMAGE_RELEASE_GRACE=0)
+    def test_released_with_last_reference(self):
+        """Файл и миниатюры удаляются вместе с последним постом."""
+        first, second = self.post('one.gif'), self.post('two.gif')
+        name = first.image.name
+        thumbnails.generate(name)
+        thumbnail = thumbnails.cached_thumbnail(first.image)
+        first.delete()
+        self.assertFalse(thumbnails.release(name))
+        self.assertTrue(default_storage.exists(name))
+        second.image = image_file('big.gif', (3, 3))
+        second.save()
+        self.assertTrue(thumbnails.release(name))
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(thumbnail.name))
+
+    def test_fresh_upload_not_released(self):
+        """Файл, только что записанный заново, release не удаляет."""
+        post = self.post('one.gif')
+        name = post.image.name
+        post.delete()
+        self.assertFalse(thumbnails.release(name))
+        self.assertTrue(default_storage.exists(name))
+        with override_settings(IMAGE_RELEASE_GRACE=0):
+            self.assertEqual(thumbnails.release_unreferenced(), 1)
+        self.assertFalse(default_storage.exists(name))
+
+    def test_variants_read_at_once(self):
+        """Варианты картинки читаются из KV-хранилища одним запросом."""
+        posts = [self.post('one.gif'), self.post('big.gif')]
+        posts[1].image = image_file('big.gif', (3, 3))
+        posts[1].save()
+        for post in posts:
+            thumbnails.generate(post.image.name)
+        cache.clear()
+        expected = len(settings.IMAGE_VARIANT_WIDTHS)
+        with self.assertNumQueries(1):
+            variants = thumbnails.cached_variants(posts[0].image)
+        self.assertEqual(len(variants[None]), expected)
+        with self.assertNumQueries(0):
+            thumbnails.cached_variants(posts[0].image)
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'srcset', count=len(posts))
+        cache.clear()
+        with self.assertNumQueries(2):
+            self.client.get(reverse('posts:index'))
+
+    def test_claimed_task_skipped(self):
+        """Задачу, взятую другим воркером, второй не обрабатывает."""
+        post = self.post('one.gif')
+        task = ThumbnailTask.objects.create(post=post, image=post.image.name)
+        self.assertEqual(thumbnails.claim(10), [task])
+        self.assertEqual(thumbnails.claim(10), [])
+        self.assertEqual(thumbnails.process_batch(10), 0)
+        self.assertTrue(ThumbnailTask.objects.filter(pk=task.pk).exists())
+
+    @override_settings(THUMBNAIL_CLAIM_TIMEOUT=0)
+    def test_stale_claim_retried(self):
+        """Задача пропавшего воркера снова берётся, пока есть попытки."""
+        post = self.post('one.gif')
+        ThumbnailTask.objects.create(post=post, image=post.image.name)
+        for _ in range(settings.THUMBNAIL_MAX_ATTEMPTS):
+            self.assertEqual(len(thumbnails.claim(10)), 1)
+        self.assertEqual(thumbnails.claim(10), [])
+        self.assertFalse(ThumbnailTask.objects.exists())
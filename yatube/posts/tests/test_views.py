@@ -4,6 +4,9 @@ from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from core.testing import run_on_commit
+
+from .. import feed_cache
 from ..models import Comment, Follow, Group, Post
 
 User = get_user_model()
@@ -75,6 +78,7 @@ class PostPagesTests(TestCase):
         }
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.author_client = Client()
         self.followed_client = Client()
@@ -137,12 +141,12 @@ class PostPagesTests(TestCase):
         for name, reverse_name in self.correct_context_names.items():
             with self.subTest(name=name):
                 response = self.author_client.get(reverse_name)
-                self.assertEqual(
-                    response.context['post'].author,
-                    self.image_post.author
+                # Карточки лент могут прийти из кеша, не создав контекста.
+                post = response.context.get('post') or (
+                    response.context['page_obj'][0]
                 )
-                self.assertEqual(
-                    response.context['post'].text, self.image_post.text)
+                self.assertEqual(post.author, self.image_post.author)
+                self.assertEqual(post.text, self.image_post.text)
 
     def test_cache(self):
         """Проверка кеширования на странице index """
@@ -198,6 +202,44 @@ class PostPagesTests(TestCase):
             )
         )
 
+    def test_follow_unfollow_idempotent(self):
+        """Повторные подписка и отписка не ломаются и не дублируют строки."""
+        follow_url = reverse(
+            'posts:profile_follow', kwargs={'username': self.followed_user}
+        )
+        unfollow_url = reverse(
+            'posts:profile_unfollow', kwargs={'username': self.followed_user}
+        )
+        subscription = Follow.objects.filter(
+            user=self.author_user, author=self.followed_user
+        )
+        for _ in range(2):
+            self.author_client.get(follow_url)
+        self.assertEqual(subscription.count(), 1)
+        for _ in range(2):
+            response = self.author_client.get(unfollow_url)
+            self.assertEqual(response.status_code, 302)
+        self.assertFalse(subscription.exists())
+
+    def test_follow_ajax(self):
+        """AJAX-подписка отвечает JSON без редиректа."""
+        url = reverse(
+            'posts:profile_follow', kwargs={'username': self.followed_user}
+        )
+        response = self.author_client.get(
+            url, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                'following': True,
+                'followers_count': Follow.objects.filter(
+                    author=self.followed_user
+                ).count(),
+            },
+        )
+
     def test_follow_index_show_correct_context(self):
         '''Новая запись пользователя появляется в ленте тех,
         кто на него подписан и не появляется в ленте тех, кто не подписан.
@@ -344,6 +386,9 @@ class PaginatorViewsTest(TestCase):
             'profile': f'/profile/{cls.user}/'
         }
 
+    def setUp(self):
+        cache.clear()
+
     def test_paginator_correct_context(self):
         """index, group_list, profile содержат 10 постов на первой странице"""
         for name, url in self.paginator_context_names.items():
@@ -357,3 +402,165 @@ class PaginatorViewsTest(TestCase):
             with self.subTest(name=name):
                 response = self.client.get(url + '?page=2')
                 self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_cursor_paginator_next_and_previous(self):
+        """Курсорная пагинация: вперёд 3 поста, назад снова 10."""
+        for name, url in self.paginator_context_names.items():
+            with self.subTest(name=name):
+                response = self.client.get(url)
+                paginator = response.context['page_obj'].paginator
+                self.assertIsNone(paginator.previous_cursor)
+                response = self.client.get(
+                    url, {'cursor': paginator.next_cursor}
+                )
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), 3)
+                self.assertFalse(page_obj.has_next())
+                self.assertTrue(page_obj.has_previous())
+                response = self.client.get(
+                    url, {'cursor': page_obj.paginator.previous_cursor}
+                )
+                self.assertEqual(len(response.context['page_obj']), 10)
+                self.assertEqual(
+                    response.context['page_obj'][0].text,
+                    'Тестовый пост 12'
+                )
+
+    def test_cursor_paginator_bad_cursor(self):
+        """Битый курсор открывает первую страницу."""
+        response = self.client.get('/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName1')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        feed_cache.stats.reset()
+
+    def test_repeated_request_hits_cache(self):
+        """Повторный запрос ленты берётся из кеша."""
+        Post.objects.create(author=self.user, text='Тестовый пост')
+        self.client.force_login(self.user)
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        # Промахи первого запроса — страница и карточка поста.
+        self.assertEqual(feed_cache.stats.misses, 2)
+        self.assertEqual(feed_cache.stats.hits, 1)
+        self.assertEqual(feed_cache.stats.ratio, 1 / 3)
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сразу появляется на закешированных страницах."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            self.client.get(url)
+        with run_on_commit():
+            Post.objects.create(
+                author=self.user, text='Свежий пост', group=self.group
+            )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Свежий пост')
+
+    def test_author_rename_invalidates_feeds(self):
+        """Новое имя автора сразу видно на главной и в группе."""
+        Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group
+        )
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+        )
+        for url in urls:
+            self.client.get(url)
+        self.user.first_name = 'Переименованный'
+        with run_on_commit():
+            self.user.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Переименованный')
+
+    def test_group_edit_invalidates_feeds(self):
+        """Изменение группы сбрасывает кеш ленты."""
+        Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group
+        )
+        self.client.get(reverse('posts:index'))
+        self.group.description = 'Новое описание'
+        with run_on_commit():
+            self.group.save()
+        self.assertContains(
+            self.client.get(reverse('posts:index')), 'Новое описание'
+        )
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName1')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': cls.user}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_response_cached(self):
+        """Повторный анонимный запрос отдаётся без рендеринга и SQL."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertIsNotNone(first.context)
+                with self.assertNumQueries(1 if url != self.urls[0] else 0):
+                    second = self.client.get(url)
+                self.assertIsNone(second.context)
+                self.assertEqual(second.content, first.content)
+                self.assertEqual(second['ETag'], first['ETag'])
+                self.assertIn('Last-Modified', second)
+
+    def test_not_modified(self):
+        """Совпавший ETag даёт 304, изменение данных — новый ETag."""
+        url = self.urls[0]
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with run_on_commit():
+            Post.objects.create(author=self.user, text='Свежий пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Свежий пост')
+
+    def test_authorized_not_cached(self):
+        """Авторизованным пользователям страница рендерится заново."""
+        self.client.force_login(self.user)
+        self.client.get(self.urls[0])
+        response = self.client.get(self.urls[0])
+        self.assertIsNotNone(response.context)
+        self.assertNotIn('ETag', response)
+
+    def test_follow_invalidates_profile(self):
+        """Подписка меняет закешированный профиль автора."""
+        url = self.urls[1]
+        self.assertContains(self.client.get(url), 'Подписчиков:')
+        reader = User.objects.create_user(username='reader')
+        with run_on_commit():
+            Follow.objects.create(user=reader, author=self.user)
+        response = self.client.get(url)
+        self.assertIsNotNone(response.context)
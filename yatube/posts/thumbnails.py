@@ -0,0 +1,345 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+from sorl.thumbnail import default, delete, get_thumbnail
+from sorl.thumbnail.base import EXTENSIONS, ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore
+
+from core.storage import ContentAddressedStorage
+
+from . import changes, feed_cache, sitemaps
+from .models import Post, ThumbnailTask
+
+logger = logging.getLogger(__name__)
+
+FEED_WIDTH, FEED_HEIGHT = 960, 339
+FEED_GEOMETRY = f'{FEED_WIDTH}x{FEED_HEIGHT}'
+FEED_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+def variant_geometry(width):
+    return f'{width}x{round(width * FEED_HEIGHT / FEED_WIDTH)}'
+
+
+def variant_formats():
+    """Форматы из IMAGE_VARIANT_FORMATS, которые умеют Pillow и sorl."""
+    Image.init()
+    return [
+        image_format for image_format in settings.IMAGE_VARIANT_FORMATS
+        if image_format in Image.SAVE and image_format in EXTENSIONS
+    ]
+
+
+class CachedThumbnailBackend(ThumbnailBackend):
+    """Ищет готовую миниатюру в KV-хранилище sorl, не создавая её."""
+
+    def get_cached_thumbnail(self, file_, geometry_string, **options):
+        return default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, **options)
+        )
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        """ImageFile миниатюры с именем, под которым её создаст sorl."""
+        source = ImageFile(file_)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+
+backend = CachedThumbnailBackend()
+
+
+def kvstore_get_many(image_files):
+    """kvstore.get для нескольких файлов: один get_many и один SELECT.
+
+    Повторяет _get_raw кешируемого KV-хранилища sorl, включая отметку
+    об отсутствии ключа; другие хранилища опрашиваются по одному.
+    """
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBStore):
+        return [kvstore.get(image_file) for image_file in image_files]
+    keys = [add_prefix(image_file.key) for image_file in image_files]
+    values = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        stored = dict(
+            KVStore.objects.filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+        fetched = {key: stored.get(key, EMPTY_VALUE) for key in missing}
+        kvstore.cache.set_many(
+            fetched, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+        )
+        values.update(fetched)
+    return [
+        None if values[key] == EMPTY_VALUE or not values[key]
+        else deserialize_image_file(values[key])
+        for key in keys
+    ]
+
+
+def cached_thumbnail(image, width=FEED_WIDTH, image_format=None):
+    if not image:
+        return None
+    options = dict(FEED_OPTIONS)
+    if image_format:
+        options['format'] = image_format
+    return backend.get_cached_thumbnail(
+        image, variant_geometry(width), **options
+    )
+
+
+def _variant_files(image):
+    """[(формат, ширина, ImageFile миниатюры)] для всех вариантов."""
+    wanted = []
+    for image_format in [None, *variant_formats()]:
+        options = dict(FEED_OPTIONS)
+        if image_format:
+            options['format'] = image_format
+        for width in settings.IMAGE_VARIANT_WIDTHS:
+            wanted.append((image_format, width, backend.thumbnail_file(
+                image, variant_geometry(width), **options
+            )))
+    return wanted
+
+
+def _group_variants(wanted, thumbnails):
+    variants = {}
+    for (image_format, width, _), thumbnail in zip(wanted, thumbnails):
+        if thumbnail:
+            ready = variants.setdefault(image_format, [])
+            ready.append((thumbnail.url, width))
+    return variants
+
+
+def cached_variants(image):
+    """Готовые варианты картинки: {формат или None: [(url, ширина)]}.
+
+    Все ширины и форматы читаются из KV-хранилища одним запросом.
+    """
+    wanted = _variant_files(image)
+    return _group_variants(
+        wanted, kvstore_get_many([file_ for _, _, file_ in wanted])
+    )
+
+
+def prefetch_variants(posts):
+    """cached_variants для картинок всех постов одним запросом.
+
+    Результат кладётся в post.image_variants, его берёт post_picture.
+    """
+    posts = [post for post in posts if post.image]
+    wanted = [_variant_files(post.image) for post in posts]
+    thumbnails = kvstore_get_many([
+        file_ for files in wanted for _, _, file_ in files
+    ])
+    start = 0
+    for post, files in zip(posts, wanted):
+        post.image_variants = _group_variants(
+            files, thumbnails[start:start + len(files)]
+        )
+        start += len(files)
+
+
+def enqueue(post):
+    if post.image:
+        ThumbnailTask.objects.create(post=post, image=post.image.name)
+
+
+def source(name):
+    """Оригинал в хранилище Post.image: ключи sorl зависят от хранилища."""
+    return ImageFile(name, Post._meta.get_field('image').storage)
+
+
+def strip_metadata(name):
+    """Пересохраняет оригинал без EXIF, повернув его по тегу ориентации.
+
+    Новое содержимое получает новое имя: посты переводятся на него, старый
+    файл освобождается. Возвращает новое имя или None, если EXIF нет, —
+    тогда повторный запуск не пережимает картинку заново.
+    """
+    storage = Post._meta.get_field('image').storage
+    with storage.open(name) as original:
+        image = Image.open(original)
+        if 'exif' not in image.info or getattr(image, 'is_animated', False):
+            return None
+        image_format = image.format
+        options = {'quality': 90} if image_format == 'JPEG' else {}
+        buffer = BytesIO()
+        ImageOps.exif_transpose(image).save(
+            buffer, image_format, exif=b'', **options
+        )
+    new_name = storage.save(name, ContentFile(buffer.getvalue()))
+    posts = list(
+        Post.objects.filter(image=name).only('pk', 'author_id', 'group_id')
+    )
+    Post.objects.filter(image=name).update(
+        image=new_name, updated_at=timezone.now()
+    )
+    _updated(posts)
+    release(name)
+    return new_name
+
+
+def _updated(posts):
+    """Работа сигналов за update(): журнал, ленты и куски карты сайта."""
+    changes.record_many(Post, [post.pk for post in posts])
+    feed_cache.invalidate_posts(posts)
+    sitemaps.invalidate_posts(posts)
+
+
+def touch(post_ids):
+    """Отмечает посты изменёнными, когда у их картинок появились варианты.
+
+    Карточки кешируются по updated_at поста, а готовые варианты меняют
+    разметку картинки.
+    """
+    posts = list(
+        Post.objects.filter(pk__in=post_ids)
+        .only('pk', 'author_id', 'group_id')
+    )
+    Post.objects.filter(pk__in=[post.pk for post in posts]).update(
+        updated_at=timezone.now()
+    )
+    _updated(posts)
+
+
+def release(name):
+    """Удаляет картинку с миниатюрами, если на неё не ссылается ни один пост.
+
+    Одинаковые загрузки хранятся одним файлом, так что счётчик ссылок —
+    это число постов с таким именем картинки. Загрузка того же файла
+    могла уже вернуть это имя, но ещё не сохранить пост: такой файл
+    свежее IMAGE_RELEASE_GRACE и остаётся до release_unreferenced.
+    """
+    if not name or Post.objects.filter(image=name).exists():
+        return False
+    storage = Post._meta.get_field('image').storage
+    if not storage.exists(name):
+        return False
+    grace = timedelta(seconds=settings.IMAGE_RELEASE_GRACE)
+    if storage.get_modified_time(name) > timezone.now() - grace:
+        return False
+    delete(source(name))
+    return True
+
+
+def release_unreferenced():
+    """Освобождает файлы по хешу, на которые не ссылается ни один пост."""
+    field = Post._meta.get_field('image')
+    storage = field.storage
+    root = field.upload_to
+    if not storage.exists(root):
+        return 0
+    released = 0
+    for directory in storage.listdir(root)[0]:
+        path = f'{root}{directory}'
+        for filename in storage.listdir(path)[1]:
+            name = f'{path}/{filename}'
+            if ContentAddressedStorage.is_hashed(name) and release(name):
+                released += 1
+    return released
+
+
+def release_later(name):
+    """release после коммита; чужие имена (не по хешу) не трогает."""
+    if ContentAddressedStorage.is_hashed(name):
+        transaction.on_commit(partial(release, name))
+
+
+def generate(image):
+    """Убирает EXIF и создаёт все ширины и форматы вариантов."""
+    try:
+        image = strip_metadata(image) or image
+        for image_format in [None, *variant_formats()]:
+            options = dict(FEED_OPTIONS)
+            if image_format:
+                options['format'] = image_format
+            for width in settings.IMAGE_VARIANT_WIDTHS:
+                get_thumbnail(
+                    source(image), variant_geometry(width), **options
+                )
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s', image)
+        return False
+    return True
+
+
+def _generate_in_thread(image):
+    try:
+        return generate(image)
+    finally:
+        connection.close()
+
+
+def generate_many(images, workers=1):
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_generate_in_thread, images))
+    return [generate(image) for image in images]
+
+
+def claim(batch_size):
+    """Забирает в работу до batch_size свободных задач и возвращает их.
+
+    Кандидаты читаются без блокировки, поэтому каждая задача берётся
+    условным UPDATE: если её уже забрал другой воркер, строка не
+    изменится. Задачи воркера, пропавшего дольше THUMBNAIL_CLAIM_TIMEOUT
+    назад, снова свободны; попытка засчитывается при взятии, так что
+    картинка, роняющая воркер, тоже исчерпает THUMBNAIL_MAX_ATTEMPTS.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.THUMBNAIL_CLAIM_TIMEOUT)
+    free = ThumbnailTask.objects.filter(
+        Q(status=ThumbnailTask.PENDING)
+        | Q(status=ThumbnailTask.PROCESSING, claimed_at__lt=stale)
+    )
+    free.filter(attempts__gte=settings.THUMBNAIL_MAX_ATTEMPTS).delete()
+    candidates = list(free.values_list('pk', flat=True)[:batch_size])
+    claimed = [
+        pk for pk in candidates
+        if free.filter(pk=pk).update(
+            status=ThumbnailTask.PROCESSING,
+            claimed_at=now,
+            attempts=F('attempts') + 1,
+        )
+    ]
+    return list(ThumbnailTask.objects.filter(pk__in=claimed))
+
+
+def process_batch(batch_size, workers=1):
+    """Обрабатывает до batch_size задач, возвращает их число."""
+    tasks = claim(batch_size)
+    if not tasks:
+        return 0
+    results = generate_many([task.image for task in tasks], workers)
+    done = [task for task, ok in zip(tasks, results) if ok]
+    failed = [task.pk for task, ok in zip(tasks, results) if not ok]
+    ThumbnailTask.objects.filter(pk__in=[task.pk for task in done]).delete()
+    ThumbnailTask.objects.filter(pk__in=failed).update(
+        status=ThumbnailTask.PENDING, claimed_at=None
+    )
+    touch({task.post_id for task in done})
+    return len(tasks)
@@ -0,0 +1,214 @@
+from django.conf import settings
+from django.db import transaction
+
+from .models import Follow, PopularAuthor, Post, TimelineEntry
+from .paginators import (CursorPaginator, FORWARD, field_value,
+                         keyset_window)
+
+
+def follower_count(author_id, limit):
+    """Число подписчиков автора, но не больше limit + 1."""
+    return Follow.objects.filter(author_id=author_id)[:limit + 1].count()
+
+
+def mark_popular(author_ids):
+    """Переводит авторов на подмешивание при чтении; раскладку отменяет."""
+    PopularAuthor.objects.filter(author_id__in=author_ids).update(
+        settling=False
+    )
+    PopularAuthor.objects.bulk_create(
+        [PopularAuthor(author_id=author_id) for author_id in author_ids],
+        ignore_conflicts=True,
+    )
+
+
+def fan_out(post):
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)[:limit + 1]
+    )
+    if len(follower_ids) > limit:
+        mark_popular([post.author_id])
+        return
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=user_id,
+                post=post,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for user_id in follower_ids
+        ],
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_many(posts):
+    """fan_out для пачки постов, вставленных в обход сигналов."""
+    followers = {}
+    for author_id, user_id in Follow.objects.filter(
+        author_id__in={post.author_id for post in posts}
+    ).values_list('author_id', 'user_id'):
+        followers.setdefault(author_id, []).append(user_id)
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    popular = [
+        author_id for author_id, user_ids in followers.items()
+        if len(user_ids) > limit
+    ]
+    if popular:
+        mark_popular(popular)
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post.pk,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for post in posts
+            if len(followers.get(post.author_id, ())) <= limit
+            for user_id in followers.get(post.author_id, ())
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def _fill(author_id, follower_ids):
+    posts = (
+        Post.objects.filter(author_id=author_id)
+        .values_list('pk', 'pub_date')
+        .iterator(chunk_size=settings.TIMELINE_BATCH_SIZE)
+    )
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for post_id, pub_date in posts
+            for user_id in follower_ids
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Дописывает посты автора в ленту нового подписчика.
+
+    Популярного автора не раскладываем: его посты подмешиваются при
+    чтении. Автор, перешедший порог этой подпиской, становится
+    популярным здесь же.
+    """
+    if PopularAuthor.objects.filter(author_id=author_id).exists():
+        return
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    if follower_count(author_id, limit) > limit:
+        mark_popular([author_id])
+        return
+    _fill(author_id, [user_id])
+
+
+def request_settle(author_id):
+    """После отписки ставит популярного автора в очередь на раскладку.
+
+    Порог ниже TIMELINE_FANOUT_LIMIT на TIMELINE_FANOUT_HYSTERESIS:
+    подписки и отписки у самого порога не гоняют полную раскладку.
+    """
+    threshold = (
+        settings.TIMELINE_FANOUT_LIMIT - settings.TIMELINE_FANOUT_HYSTERESIS
+    )
+    popular = PopularAuthor.objects.filter(
+        author_id=author_id, settling=False
+    )
+    if not popular.exists():
+        return
+    if follower_count(author_id, threshold) <= threshold:
+        popular.update(settling=True)
+
+
+def settle(author_id):
+    """Раскладывает посты автора по лентам и снимает подмешивание.
+
+    Строка PopularAuthor удаляется в той же транзакции первой: она же
+    захват задачи, и пока транзакция пишет, новые подписки ждут её.
+    Возвращает False, если задачу забрал другой воркер или отменила
+    новая подписка.
+    """
+    with transaction.atomic():
+        claimed, _ = PopularAuthor.objects.filter(
+            author_id=author_id, settling=True
+        ).delete()
+        if not claimed:
+            return False
+        _fill(author_id, list(
+            Follow.objects.filter(author_id=author_id)
+            .values_list('user_id', flat=True)
+        ))
+    return True
+
+
+def process_batch(batch_size):
+    """Раскладывает до batch_size авторов из очереди, возвращает их число."""
+    author_ids = list(
+        PopularAuthor.objects.filter(settling=True)
+        .values_list('author_id', flat=True)[:batch_size]
+    )
+    for author_id in author_ids:
+        settle(author_id)
+    return len(author_ids)
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def popular_author_ids(user):
+    return list(
+        PopularAuthor.objects.filter(
+            author__in=Follow.objects.filter(user=user).values('author'),
+        ).values_list('author_id', flat=True)
+    )
+
+
+class TimelinePaginator(CursorPaginator):
+    """Лента подписок из материализованной таблицы TimelineEntry.
+
+    Посты популярных авторов не раскладываются по лентам при записи,
+    а подмешиваются при чтении тем же keyset-окном.
+    """
+
+    def __init__(self, user, per_page, queryset=None):
+        if queryset is None:
+            queryset = Post.objects.select_related('author', 'group')
+        super().__init__(queryset, per_page)
+        self.user = user
+
+    def fetch(self, direction, key, limit):
+        entries = TimelineEntry.objects.filter(
+            user=self.user
+        ).values_list('post_id', flat=True)
+        post_ids = list(keyset_window(
+            entries, direction, key, limit, fields=('pub_date', 'post_id')
+        ))
+        posts = list(self.object_list.filter(pk__in=post_ids).order_by())
+        popular = popular_author_ids(self.user)
+        if popular:
+            posts += keyset_window(
+                self.object_list.filter(author__in=popular),
+                direction, key, limit
+            )
+        unique = {field_value(post, 'pk'): post for post in posts}
+        return sorted(
+            unique.values(),
+            key=lambda post: (
+                field_value(post, 'pub_date'), field_value(post, 'pk')
+            ),
+            reverse=direction == FORWARD,
+        )[:limit]
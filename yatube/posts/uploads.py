@@ -0,0 +1,84 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadhandler import (FileUploadHandler, SkipFile,
+                                             StopUpload)
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+# Заголовок картинки с форматом и размерами почти всегда в первом
+# куске загрузки; JPEG с большим EXIF ждём не дальше этого предела.
+HEADER_LIMIT = 256 * 1024
+
+
+def check_header(image_format, size):
+    """Сообщение об ошибке для формата и размеров картинки или None."""
+    if image_format not in settings.IMAGE_UPLOAD_FORMATS:
+        return 'Допустимые форматы: {}.'.format(
+            ', '.join(settings.IMAGE_UPLOAD_FORMATS)
+        )
+    width, height = size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        return f'Слишком большое изображение: {width}×{height} пикселей.'
+    return None
+
+
+def read_header(head):
+    """(формат, размеры) из начала файла; Image.open не декодирует пиксели."""
+    with Image.open(BytesIO(head)) as image:
+        return image.format, image.size
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """Проверяет загружаемую картинку, пока тело запроса ещё читается.
+
+    Стоит первым в FILE_UPLOAD_HANDLERS и пропускает куски дальше,
+    стандартным обработчикам, которые пишут большие файлы на диск. Размер
+    считается по мере чтения, формат и размеры в пикселях — по заголовку,
+    до полного декодирования. Отклонённый файл не попадает в FILES, а
+    причина остаётся в request.upload_errors для формы.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.head = b''
+        self.checked = False
+
+    def reject(self, message):
+        if not hasattr(self.request, 'upload_errors'):
+            self.request.upload_errors = {}
+        self.request.upload_errors[self.field_name] = message
+
+    def check_head(self, final=False):
+        """True, если картинку можно загружать дальше."""
+        try:
+            message = check_header(*read_header(self.head))
+        except Image.DecompressionBombError:
+            message = 'Слишком большое изображение.'
+        except Exception:
+            if not final and len(self.head) < HEADER_LIMIT:
+                return True
+            message = 'Загрузите правильное изображение.'
+        self.checked = True
+        if message:
+            self.reject(message)
+        return message is None
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.IMAGE_MAX_UPLOAD_SIZE:
+            self.reject('Файл больше {}.'.format(
+                filesizeformat(settings.IMAGE_MAX_UPLOAD_SIZE)
+            ))
+            # Остаток тела не читаем: воркер свободен сразу.
+            raise StopUpload(connection_reset=True)
+        if not self.checked:
+            self.head += raw_data[:HEADER_LIMIT - len(self.head)]
+            if not self.check_head():
+                raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        # Здесь SkipFile уже не поймают: файл отклонит форма по ошибке.
+        if not self.checked:
+            self.check_head(final=True)
+        return None
@@ -1,16 +1,42 @@
 from django.urls import path
 
-from . import views
+from . import sitemaps, syndication, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('create/', views.post_create, name='post_create'),
+    path('group/', views.group_directory, name='group_directory'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/rss/',
+        syndication.group_feed,
+        {'feed_type': 'rss'},
+        name='group_rss'),
+    path(
+        'group/<slug:slug>/atom/',
+        syndication.group_feed,
+        {'feed_type': 'atom'},
+        name='group_atom'),
+    path('search/', views.search, name='search'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/rss/',
+        syndication.author_feed,
+        {'feed_type': 'rss'},
+        name='profile_rss'),
+    path(
+        'profile/<str:username>/atom/',
+        syndication.author_feed,
+        {'feed_type': 'atom'},
+        name='profile_atom'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
@@ -26,4 +52,9 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap'),
+    path(
+        'sitemap-<slug:section>-<int:chunk>.xml',
+        sitemaps.sitemap_chunk,
+        name='sitemap_chunk'),
 ]
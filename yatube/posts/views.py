@@ -2,21 +2,40 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.query_budget import query_budget
+from core.routers import replica_reads
+
+from . import search as post_search
+from . import thumbnails
+from .comments import (CommentThread, ReplyPage, is_path, reply_parent,
+                       serialize_thread)
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
+from .groups import GroupPaginator, directory, group_cache
+from .models import Comment, Follow, Post, UserStats
+from .paginators import CursorPaginator, NextPagePaginator
+from .response_cache import (cache_anonymous, directory_scopes,
+                             group_scopes, index_scopes, post_scopes,
+                             profile_scopes)
+from .timeline import TimelinePaginator
 
 User = get_user_model()
 
 
 def paginator(request, post_list):
-    post = Paginator(post_list, settings.POST_AMOUNT)
-    page_number = request.GET.get('page')
-    page_obj = post.get_page(page_number)
-    return page_obj
+    if 'page' in request.GET:
+        post = Paginator(post_list, settings.POST_AMOUNT)
+        return post.get_page(request.GET.get('page'))
+    post = CursorPaginator(post_list, settings.POST_AMOUNT)
+    return post.get_page(request.GET.get('cursor'))
 
 
+@replica_reads
+@cache_anonymous(index_scopes)
+@query_budget(4)
 def index(request):
     post_list = Post.objects.select_related('group', 'author')
     context = {
@@ -25,22 +44,62 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@replica_reads
+@cache_anonymous(group_scopes)
+@query_budget(5)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author')
+    group = group_cache.get(slug)
+    if group is None:
+        raise Http404('Группа не найдена.')
+    if 'page' in request.GET:
+        page_obj = paginator(request, group.posts.select_related('author'))
+    else:
+        page_obj = GroupPaginator(group, settings.POST_AMOUNT).get_page(
+            request.GET.get('cursor')
+        )
     context = {
         'group': group,
-        'page_obj': paginator(request, post_list),
+        'page_obj': page_obj,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@cache_anonymous(directory_scopes)
+@query_budget(2)
+def group_directory(request):
+    context = {
+        'groups': directory(),
+    }
+    return render(request, 'posts/groups.html', context)
+
+
+@query_budget(4)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    post = NextPagePaginator(
+        post_search.search(query), settings.POST_AMOUNT,
+        settings.SEARCH_MAX_PAGES,
+    )
+    context = {
+        'q': query,
+        'page_obj': post.get_page(request.GET.get('page')),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@replica_reads
+@cache_anonymous(profile_scopes)
+@query_budget(6)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
     post_list = author.posts.select_related('group')
     following = False
     if request.user.is_authenticated:
-        following = Follow.objects.filter(user=request.user, author=author)
+        following = Follow.objects.filter(
+            user=request.user, author=author
+        ).exists()
     context = {
         'author': author,
         'page_obj': paginator(request, post_list),
@@ -49,41 +108,74 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@replica_reads
+@cache_anonymous(post_scopes)
+@query_budget(5)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    form = CommentForm()
-    comments = post.comments.select_related('author')
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group', 'stats'),
+        pk=post_id
+    )
+    cursor = request.GET.get('cursor')
+    reply_to = request.GET.get('reply_to', '')
     context = {
         'post': post,
-        'form': form,
-        'comments': comments
+        'form': CommentForm(),
+        'comments': CommentThread(post, cursor),
+        'cursor': cursor,
+        'reply_to': reply_to if reply_to.isdigit() else '',
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@query_budget(5)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    replies_after = request.GET.get('replies_after')
+    if replies_after is not None:
+        if not is_path(replies_after):
+            raise Http404('Нет такой ветки комментариев.')
+        cursor = f'replies:{replies_after}'
+        comments = ReplyPage(post, replies_after)
+    else:
+        cursor = request.GET.get('cursor')
+        comments = CommentThread(post, cursor)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(serialize_thread(comments))
+    context = {'post': post, 'comments': comments, 'cursor': cursor}
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required
+@query_budget(12)
 def post_create(request):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
+        upload_errors=getattr(request, 'upload_errors', None),
     )
     if not form.is_valid():
         return render(request, 'posts/create_post.html', {'form': form})
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    thumbnails.enqueue(post)
     return redirect('posts:profile', username=post.author)
 
 
 @login_required
+@query_budget(8)
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author'), id=post_id
+    )
     if request.user != post.author:
         return redirect('posts:profile', username=post.author)
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
+        upload_errors=getattr(request, 'upload_errors', None),
     )
     if not form.is_valid():
         return render(
@@ -92,10 +184,13 @@ def post_edit(request, post_id):
             {'form': form, 'editing': True}
         )
     form.save()
+    if 'image' in form.changed_data:
+        thumbnails.enqueue(post)
     return redirect('posts:post_detail', post.pk)
 
 
 @login_required
+@query_budget(7)
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -103,34 +198,60 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        parent_id = request.POST.get('parent', '')
+        if parent_id.isdigit():
+            comment.parent = reply_parent(
+                Comment.objects.filter(pk=parent_id, post=post).first()
+            )
         comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
+@query_budget(6)
 def follow_index(request):
-    post_list = (
-        Post.objects.filter(author__following__user=request.user)
-        .select_related('author', 'group')
-    )
-    return render(
-        request, 'posts/follow.html',
-        {'page_obj': paginator(request, post_list)}
-    )
+    if 'page' in request.GET:
+        post_list = (
+            Post.objects.filter(author__following__user=request.user)
+            .select_related('author', 'group')
+        )
+        page_obj = paginator(request, post_list)
+    else:
+        timeline = TimelinePaginator(request.user, settings.POST_AMOUNT)
+        page_obj = timeline.get_page(request.GET.get('cursor'))
+    return render(request, 'posts/follow.html', {'page_obj': page_obj})
+
+
+def follow_response(request, author, following):
+    """AJAX-запросу — JSON с новым состоянием, иначе редирект в профиль."""
+    if not request.is_ajax():
+        return redirect('posts:profile', username=author.username)
+    followers_count = UserStats.objects.filter(
+        user_id=author.pk
+    ).values_list('followers_count', flat=True).first()
+    return JsonResponse({
+        'following': following,
+        'followers_count': followers_count or 0,
+    })
 
 
 @login_required
+@query_budget(12)
 def profile_follow(request, username):
-    author = User.objects.get(username=username)
-    if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
-    return redirect('posts:profile', username=username)
+    author = get_object_or_404(User, username=username)
+    if author == request.user:
+        return follow_response(request, author, False)
+    try:
+        with transaction.atomic():
+            Follow.objects.create(user=request.user, author=author)
+    except IntegrityError:
+        pass
+    return follow_response(request, author, True)
 
 
 @login_required
+@query_budget(9)
 def profile_unfollow(request, username):
-    Follow.objects.get(
-        user=request.user,
-        author__username=username
-    ).delete()
-    return redirect('posts:profile', username=username)
+    author = get_object_or_404(User, username=username)
+    Follow.objects.filter(user=request.user, author=author).delete()
+    return follow_response(request, author, False)
@@ -0,0 +1,21 @@
+// Следующие страницы комментариев подгружаются HTML-фрагментом.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('[data-fragment-url]');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.dataset.fragmentUrl, {credentials: 'same-origin'})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      link.closest('[data-comments-more]').outerHTML = html;
+    })
+    .catch(function () {
+      window.location = link.href;
+    });
+});
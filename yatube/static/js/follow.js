@@ -0,0 +1,36 @@
+// Подписка и отписка без перезагрузки профиля.
+document.addEventListener('DOMContentLoaded', function () {
+  var button = document.querySelector('[data-follow-toggle]');
+  var counter = document.querySelector('[data-followers-count]');
+  if (!button) {
+    return;
+  }
+  button.addEventListener('click', function (event) {
+    event.preventDefault();
+    fetch(button.href, {
+      credentials: 'same-origin',
+      headers: {'X-Requested-With': 'XMLHttpRequest'},
+    })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.statusText);
+        }
+        return response.json();
+      })
+      .then(function (data) {
+        var following = data.following;
+        button.href = following
+          ? button.dataset.unfollowUrl
+          : button.dataset.followUrl;
+        button.textContent = following ? 'Отписаться' : 'Подписаться';
+        button.classList.toggle('btn-light', following);
+        button.classList.toggle('btn-primary', !following);
+        if (counter) {
+          counter.textContent = data.followers_count;
+        }
+      })
+      .catch(function () {
+        window.location = button.href;
+      });
+  });
+});
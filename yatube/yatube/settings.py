@@ -2,6 +2,37 @@ import os
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 POST_AMOUNT = 10
+SEARCH_MAX_PAGES = 50
+COMMENTS_PER_PAGE = 20
+COMMENT_MAX_DEPTH = 5
+COMMENT_REPLIES_PER_PAGE = 50
+TIMELINE_FANOUT_LIMIT = 1000
+# Явный batch_size в bulk_create Django 2.2 не урезает под лимит SQLite в
+# 999 параметров: у записей ленты и журнала по четыре поля на строку.
+TIMELINE_BATCH_SIZE = 200
+# Автор снова раскладывается по лентам, когда подписчиков не больше
+# TIMELINE_FANOUT_LIMIT - TIMELINE_FANOUT_HYSTERESIS.
+TIMELINE_FANOUT_HYSTERESIS = 100
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_MAX_ATTEMPTS = 3
+# Через сколько секунд задачу упавшего воркера можно взять снова.
+THUMBNAIL_CLAIM_TIMEOUT = 10 * 60
+IMAGE_VARIANT_WIDTHS = (320, 640, 960)
+IMAGE_VARIANT_FORMATS = ('WEBP',)
+IMAGE_UPLOAD_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+IMAGE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+# Сколько секунд файл без ссылок не удаляется после последней записи.
+IMAGE_RELEASE_GRACE = 60 * 60
+ADMIN_SEARCH_LIMIT = 1000
+CHANGES_PAGE_SIZE = 1000
+CHANGES_BATCH_SIZE = 200
+SITEMAP_CHUNK_SIZE = 5000
+SYNDICATION_ITEMS = 20
+METRICS_BUFFER_SIZE = 1000
+# Порог в мс для лога медленных запросов с SQL; None — лог выключен.
+METRICS_SLOW_REQUEST_MS = None
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 SECRET_KEY = '+ww56@qk(%u^td_wa%u_xp(28bia8u+gmg1in+hn806rg7a+$w'
 DEBUG = True
@@ -11,6 +42,7 @@ ALLOWED_HOSTS = [
     '[::1]',
     'testserver',
 ]
+INTERNAL_IPS = ['127.0.0.1']
 
 INSTALLED_APPS = [
     'posts.apps.PostsConfig',
@@ -27,6 +59,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -38,12 +72,19 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Вне отладки шаблоны разбираются один раз на процесс.
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -59,10 +100,26 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # WAL и прагмы при подключении, повтор записи при SQLITE_BUSY.
+        'ENGINE': 'core.sqlite',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живёт, пока жив воркер: прагмы и mmap — один раз.
+        'CONN_MAX_AGE': None,
     }
 }
+# Локальная реплика — копия основной базы (manage.py sync_replicas).
+REPLICA_DATABASE = os.environ.get('YATUBE_REPLICA_DB')
+if REPLICA_DATABASE:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': REPLICA_DATABASE,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Столько секунд после записи автор читает из основной базы; столько же
+# живёт кеш лент, отрендеренных по данным реплики.
+REPLICA_PIN_SECONDS = 10
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -81,9 +138,13 @@ AUTH_PASSWORD_VALIDATORS = [
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
+# Тесты получают свой файл кеша: см. core.testing.
+TEST_RUNNER = 'core.test_runner.IsolatedCacheRunner'
 
 LANGUAGE_CODE = 'ru'
 
@@ -104,3 +165,11 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Загрузки проверяются по заголовку, пока читаются; всё крупнее
+# FILE_UPLOAD_MAX_MEMORY_SIZE пишется кусками во временный файл.
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.ImageUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024